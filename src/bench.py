@@ -0,0 +1,223 @@
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from random import Random
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable
+import json
+import os
+import platform
+import numpy as np
+from config import DECISION_COLUMN_SYMBOL
+from node import Node
+from utils import read_dataset, get_data_rows, get_rows_count, evaluate
+
+BASE_CASE = {"rows": 10000, "attrs": 10, "cardinality": 6, "classes": 3}
+CURVES = {
+    "rows": [1000, 10000, 100000],
+    "attrs": [5, 10, 20],
+    "cardinality": [2, 6, 24],
+    "classes": [2, 3, 8],
+}
+
+
+def generate_data(
+    path: str,
+    rows: int,
+    attrs: int,
+    cardinality: int,
+    classes: int,
+    noise: float = 0.2,
+    seed: int = 0,
+) -> None:
+    """
+    Function generating synthetic categorical dataset file. Decision depends on values
+    of first (up to) three attributes, part of decisions is replaced with random ones.
+
+    Parameters:
+        path (str): path to dataset file
+
+        rows (int): number of rows
+
+        attrs (int): number of attributes (without decision column)
+
+        cardinality (int): number of distinct values of every attribute
+
+        classes (int): number of decision classes
+
+        noise (float): fraction of rows with random decision
+
+        seed (int): seed of random generator
+    """
+    rng = Random(seed)
+    with open(path, "w") as file:
+        for _ in range(rows):
+            codes = [rng.randrange(cardinality) for _ in range(attrs)]
+            decision = sum(codes[:3]) % classes if rng.random() >= noise else rng.randrange(classes)
+            file.write(",".join([*(f"v{code}" for code in codes), f"k{decision}"]) + "\n")
+
+
+def time_call(
+    func: Callable[[object], object], setup: Callable[[], object] = lambda: None, repeat: int = 3
+) -> dict[str, float | int]:
+    """
+    Function timing a call, setup is run before every call and isn't timed.
+
+    Parameters:
+        func (Callable[[object], object]): timed function, gets result of setup
+
+        setup (Callable[[], object]): function preparing argument of timed function
+
+        repeat (int): number of timed calls
+
+    Returns:
+        timing (dict[str, float | int]): minimal and median time in seconds, number of calls
+    """
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        start = perf_counter()
+        func(arg)
+        times.append(perf_counter() - start)
+    return {"min": min(times), "median": median(times), "repeat": repeat}
+
+
+def run_case(
+    rows: int,
+    attrs: int,
+    cardinality: int,
+    classes: int,
+    repeat: int = 3,
+    k: int = 4,
+    seed: int = 0,
+    max_bins: int | None = None,
+) -> dict:
+    """
+    Function timing tree pipeline steps on synthetic dataset.
+
+    Parameters:
+        rows (int): number of rows
+
+        attrs (int): number of attributes
+
+        cardinality (int): number of distinct values of every attribute
+
+        classes (int): number of decision classes
+
+        repeat (int): number of timed calls of every step
+
+        k (int): number of cross validation chunks
+
+        seed (int): seed of data generator
+
+        max_bins (int | None): number of bins (see Dataset.get_bins) to compare building and accuracy
+        of binned dataset with, binned dataset isn't tested if None
+
+    Returns:
+        case_results (dict): case parameters, tree size, accuracy and timings of steps
+    """
+    with TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bench.data")
+        generate_data(path, rows, attrs, cardinality, classes, seed=seed)
+        timings = {"read_dataset": time_call(lambda _: read_dataset(path), repeat=repeat)}
+        data = read_dataset(path)
+    rows_count = get_rows_count(data)
+    train_ds = get_data_rows(data, 0, rows_count // 2)
+    test_ds = get_data_rows(data, rows_count // 2, rows_count)
+    d_classes = test_ds.vocab[DECISION_COLUMN_SYMBOL]
+
+    def build() -> Node:
+        return Node.build_tree_struct(Node(), train_ds)  # type: ignore
+
+    timings["build_tree_struct"] = time_call(lambda _: build(), repeat=repeat)
+    timings["prune"] = time_call(lambda tree: tree.prune(), build, repeat)  # type: ignore
+    timings["prunev2"] = time_call(lambda tree: tree.prunev2(test_ds), build, repeat)  # type: ignore
+    tree = build()
+    timings["test_tree"] = time_call(lambda _: tree.test_tree(test_ds, d_classes), repeat=repeat)
+    timings["cross_validation"] = time_call(lambda _: Node().cross_validation(data, k), repeat=repeat)
+    results = {
+        "params": {"rows": rows, "attrs": attrs, "cardinality": cardinality, "classes": classes},
+        "tree_nodes": len(tree.compile().feature),
+        "tree_depth": tree.get_depth(),
+        "accuracy": evaluate(tree.test_tree(test_ds, d_classes))[0],
+        "timings": timings,
+    }
+    if max_bins is not None:
+        bins = train_ds.get_bins(max_bins)
+        binned_train_ds, binned_test_ds = train_ds.apply_bins(bins), test_ds.apply_bins(bins)
+        timings["build_tree_struct_binned"] = time_call(
+            lambda _: Node.build_tree_struct(Node(), binned_train_ds), repeat=repeat
+        )
+        binned_tree: Node = Node.build_tree_struct(Node(), binned_train_ds)  # type: ignore
+        results["binned"] = {
+            "max_bins": max_bins,
+            "loss": train_ds.get_bins_loss(bins),
+            "tree_nodes": len(binned_tree.compile().feature),
+            "accuracy": evaluate(binned_tree.test_tree(binned_test_ds, d_classes))[0],
+        }
+    return results
+
+
+def run_benchmarks(
+    curves: dict[str, list[int]],
+    base_case: dict[str, int],
+    repeat: int = 3,
+    max_bins: int | None = None,
+) -> dict:
+    """
+    Function running scaling curves, every curve changes one parameter of base case.
+
+    Parameters:
+        curves (dict[str, list[int]]): key - parameter name, value - its values
+
+        base_case (dict[str, int]): parameters of base case
+
+        repeat (int): number of timed calls of every step
+
+        max_bins (int | None): number of bins to compare binned datasets with (see run_case)
+
+    Returns:
+        results (dict): environment description and results of cases grouped by curve
+    """
+    results = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "base_case": base_case,
+        "curves": {},
+    }
+    for param, values in curves.items():
+        results["curves"][param] = []
+        for value in values:
+            case = base_case | {param: value}
+            print(f"{param}={value} {case}", flush=True)
+            results["curves"][param].append(run_case(**case, repeat=repeat, max_bins=max_bins))
+    return results
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(
+        description="Benchmark decision tree pipeline on synthetic data. Every curve changes one parameter "
+        "of base case, other parameters keep base case values (set with --base-<parameter>)."
+    )
+    for param, values in CURVES.items():
+        parser.add_argument(f"--{param}", type=int, nargs="*", default=values, help=f"values of {param} curve")
+    for param, value in BASE_CASE.items():
+        parser.add_argument(
+            f"--base-{param}", type=int, default=value, help=f"{param} of base case (default {value})"
+        )
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed calls of every step")
+    parser.add_argument("--bins", type=int, default=None, help="compare with datasets binned into that many bins")
+    parser.add_argument("--output", default="../bench_output.json", help="path to JSON results file")
+    args = parser.parse_args()
+    curves = {param: getattr(args, param) for param in CURVES.keys()}
+    base_case = {param: getattr(args, f"base_{param}") for param in BASE_CASE.keys()}
+    results = run_benchmarks(curves, base_case, args.repeat, args.bins)
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results saved to {args.output}")
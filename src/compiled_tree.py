@@ -0,0 +1,306 @@
+from typing import TYPE_CHECKING
+import numpy as np
+from config import OTHER_BIN_VALUE
+from dataset import Dataset, get_threshold_vals
+from tree_file import read_tree_file
+
+if TYPE_CHECKING:
+    from node import Node
+
+
+class CompiledTree:
+    """
+    Decision tree flattened into arrays, nodes are indexed in preorder (root is 0).
+    Internal node i tests attribute attr_names[feature[i]], its child for value code c
+    is table[offset[i] + c] (-1 if there is no such child). Internal node splitting numeric
+    attribute has threshold[i] set (NaN for categorical attributes), its children are
+    table[offset[i]] (values lower or equal) and table[offset[i] + 1] (greater values).
+    Leaves have feature -1 and leaf_class set to code of their decision (-1 if leaf has no decision).
+    Values of binned categorical attributes not kept in bins are encoded as OTHER_BIN_VALUE.
+    """
+
+    __slots__ = (
+        "attr_names",
+        "vocab",
+        "numeric_attrs",
+        "classes",
+        "feature",
+        "offset",
+        "table",
+        "leaf_class",
+        "threshold",
+        "bins",
+    )
+
+    def __init__(
+        self,
+        attr_names: list[str],
+        vocab: dict[str, list[str]],
+        classes: list[str],
+        feature: np.ndarray,
+        offset: np.ndarray,
+        table: np.ndarray,
+        leaf_class: np.ndarray,
+        numeric_attrs: list[str] | None = None,
+        threshold: np.ndarray | None = None,
+        bins: dict[str, list[str]] | None = None,
+    ):
+        self.attr_names = attr_names
+        self.vocab = vocab
+        self.numeric_attrs = numeric_attrs or []
+        self.classes = classes
+        self.feature = feature
+        self.offset = offset
+        self.table = table
+        self.leaf_class = leaf_class
+        self.threshold = threshold if threshold is not None else np.full(len(feature), np.nan)
+        self.bins = bins or {}
+
+    @staticmethod
+    def from_node(root: "Node") -> "CompiledTree":
+        """
+        Function flattening decision tree into arrays.
+
+        Parameters:
+            root (Node): root of decision tree
+
+        Returns:
+            compiled_tree (CompiledTree): flattened decision tree
+        """
+        nodes = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            if not node.is_decision:
+                stack.extend(reversed(node.children))
+        index = {id(node): i for i, node in enumerate(nodes)}
+        internal = [node for node in nodes if node.children and not node.is_decision]
+        attr_names = sorted(set(node.name for node in internal))
+        numeric_attrs = sorted(set(node.name for node in internal if node.threshold is not None))
+        vocab = {
+            attr: sorted(
+                set(c.val for node in internal if node.name == attr and node.threshold is None for c in node.children)
+            )
+            for attr in attr_names
+        }
+        classes = sorted(set(node.name for node in nodes if node.is_decision))
+        bins = {
+            attr: vals
+            for attr, vals in (root.bins or {}).items()
+            if attr in vocab and OTHER_BIN_VALUE in vocab[attr]
+        }
+        attr_index = {attr: i for i, attr in enumerate(attr_names)}
+        class_index = {class_: i for i, class_ in enumerate(classes)}
+        feature = np.full(len(nodes), -1, dtype=np.int32)
+        offset = np.zeros(len(nodes), dtype=np.int64)
+        leaf_class = np.full(len(nodes), -1, dtype=np.int32)
+        threshold = np.full(len(nodes), np.nan)
+        table = []
+        for i, node in enumerate(nodes):
+            if node.is_decision:
+                leaf_class[i] = class_index[node.name]
+            elif node.children:
+                feature[i] = attr_index[node.name]
+                offset[i] = len(table)
+                if node.threshold is not None:
+                    threshold[i] = node.threshold
+                    table.extend(
+                        index[id(child)] if child else -1
+                        for child in map(node.get_child_by_value, get_threshold_vals(node.threshold))
+                    )
+                    continue
+                val_index = {val: code for code, val in enumerate(vocab[node.name])}
+                children = [-1] * len(val_index)
+                for child in node.children:
+                    if children[val_index[child.val]] == -1:
+                        children[val_index[child.val]] = index[id(child)]
+                table.extend(children)
+        return CompiledTree(
+            attr_names,
+            vocab,
+            classes,
+            feature,
+            offset,
+            np.array(table, dtype=np.int32),
+            leaf_class,
+            numeric_attrs,
+            threshold,
+            bins,
+        )
+
+    def get_arrays(self) -> tuple[dict, dict[str, np.ndarray]]:
+        """
+        Method returning compiled tree as JSON serializable header and arrays (see write_tree_file).
+
+        Returns:
+            compiled_tree (tuple[dict, dict[str, np.ndarray]]): header and arrays
+        """
+        header = {
+            "attr_names": self.attr_names,
+            "vocab": self.vocab,
+            "numeric_attrs": self.numeric_attrs,
+            "classes": self.classes,
+            "bins": self.bins,
+        }
+        arrays = {
+            "feature": self.feature,
+            "offset": self.offset,
+            "table": self.table,
+            "leaf_class": self.leaf_class,
+            "threshold": self.threshold,
+        }
+        return header, arrays
+
+    @staticmethod
+    def from_arrays(header: dict, arrays: dict[str, np.ndarray]) -> "CompiledTree":
+        """
+        Function creating compiled tree from header and arrays returned by get_arrays.
+
+        Parameters:
+            header (dict): header with attribute names, vocabularies and classes
+
+            arrays (dict[str, np.ndarray]): tree arrays
+
+        Returns:
+            compiled_tree (CompiledTree): flattened decision tree
+        """
+        return CompiledTree(
+            header["attr_names"],
+            header["vocab"],
+            header["classes"],
+            arrays["feature"],
+            arrays["offset"],
+            arrays["table"],
+            arrays["leaf_class"],
+            header.get("numeric_attrs"),
+            arrays.get("threshold"),
+            header.get("bins"),
+        )
+
+    @staticmethod
+    def load(path: str, use_mmap: bool = True) -> "CompiledTree":
+        """
+        Function loading compiled tree from tree file saved with Node.save, tree nodes
+        are not created so loading takes time independent of tree size.
+
+        Parameters:
+            path (str): path to tree file
+
+            use_mmap (bool): memory map tree arrays instead of reading them
+
+        Returns:
+            compiled_tree (CompiledTree): flattened decision tree
+        """
+        return CompiledTree.from_arrays(*read_tree_file(path, use_mmap))
+
+    def encode(self, data: Dataset | dict[str, list[str]]) -> np.ndarray:
+        """
+        Method encoding dataset with vocabularies of the tree.
+
+        Parameters:
+            data (Dataset | dict[str, list[str]]): encoded dataset or dataset as dictionary
+
+        Returns:
+            codes (np.ndarray): rows x tree attributes matrix of value codes (-1 for values unknown to the tree),
+            numbers are used for numeric attributes (matrix is float then)
+        """
+        if isinstance(data, dict):
+            data = Dataset.from_dict(data)
+        dtype = np.float64 if self.numeric_attrs else np.int32
+        codes = np.empty((len(data), len(self.attr_names)), dtype=dtype)
+        for i, attr in enumerate(self.attr_names):
+            if attr in self.numeric_attrs:
+                codes[:, i] = data.get_values(attr)[data.codes[attr]]
+                continue
+            val_index = {val: code for code, val in enumerate(self.vocab[attr])}
+            vals = data.vocab[attr]
+            if attr in self.bins:
+                kept = set(self.bins[attr])
+                vals = [val if val in kept else OTHER_BIN_VALUE for val in vals]
+            remap = np.array([val_index.get(val, -1) for val in vals], dtype=np.int32)
+            codes[:, i] = remap[data.codes[attr]] if len(remap) else -1
+        return codes
+
+    def get_row_keys(self, codes: np.ndarray) -> np.ndarray | None:
+        """
+        Method packing encoded rows into single integers (equal rows get equal keys).
+
+        Parameters:
+            codes (np.ndarray): rows x tree attributes matrix of value codes (see encode)
+
+        Returns:
+            keys (np.ndarray | None): key of every row, None if rows can't be packed into 64-bit integers
+        """
+        if self.numeric_attrs:
+            return None
+        multipliers, multiplier = [], 1
+        for attr in self.attr_names:
+            multipliers.append(multiplier)
+            multiplier *= len(self.vocab[attr]) + 1
+        if multiplier >= 2**63:
+            return None
+        return (codes.astype(np.int64) + 1) @ np.array(multipliers, dtype=np.int64)
+
+    def predict_codes(self, data: Dataset | dict[str, list[str]], dedup: bool = False) -> np.ndarray:
+        """
+        Method routing all dataset rows through the tree at once, one tree level per step.
+        With dedup rows with the same values of tree attributes are routed once, it pays off only
+        if routing costs more than sorting rows (finding distinct rows is usually slower than routing all rows).
+
+        Parameters:
+            data (Dataset | dict[str, list[str]]): encoded dataset or dataset as dictionary
+
+            dedup (bool): route every distinct row once (categorical attributes only)
+
+        Returns:
+            decisions (np.ndarray): codes of decisions (indexes of classes, -1 if no decision was made)
+        """
+        codes = self.encode(data)
+        keys = self.get_row_keys(codes) if dedup and len(codes) else None
+        if keys is None:
+            return self.__route(codes)
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        return self.__route(codes[first])[inverse]
+
+    def __route(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Method routing encoded rows through the tree, one tree level per step.
+
+        Parameters:
+            codes (np.ndarray): rows x tree attributes matrix of value codes (see encode)
+
+        Returns:
+            decisions (np.ndarray): codes of decisions (indexes of classes, -1 if no decision was made)
+        """
+        current = np.zeros(len(codes), dtype=np.int32)
+        active = np.arange(len(codes))
+        while active.size:
+            feature = self.feature[current[active]]
+            active = active[feature >= 0]
+            feature = feature[feature >= 0]
+            nodes = current[active]
+            vals = codes[active, feature]
+            if self.numeric_attrs:
+                thresholds = self.threshold[nodes]
+                vals = np.where(np.isnan(thresholds), vals, vals > thresholds).astype(np.int64)
+            next_nodes = np.where(
+                vals >= 0, self.table[self.offset[nodes] + np.maximum(vals, 0)], -1
+            )
+            current[active] = next_nodes
+            active = active[next_nodes >= 0]
+        return np.where(current >= 0, self.leaf_class[np.maximum(current, 0)], -1)
+
+    def predict_batch(self, data: Dataset | dict[str, list[str]], dedup: bool = False) -> list[str | None]:
+        """
+        Method predicting decisions for all dataset rows.
+
+        Parameters:
+            data (Dataset | dict[str, list[str]]): encoded dataset or dataset as dictionary
+
+            dedup (bool): route every distinct row once (see predict_codes)
+
+        Returns:
+            decisions (list[str | None]): decisions made with decision tree
+        """
+        return np.array([*self.classes, None], dtype=object)[self.predict_codes(data, dedup)].tolist()
@@ -3,4 +3,23 @@ DATA_FILE_PATH = "../data/gielda.txt"
 OUTPUT_PATH = "../tree.txt"
 INDENT = "      "
 PRUNE_THRESHOLD = 0.75
+MAX_DEPTH = None
+MIN_SAMPLES_SPLIT = 2
+MIN_GAIN_RATIO = None
+MAX_NODES = None
 TEST_DATA_RATIO = 0.3
+JOBS = 1
+PARALLEL_MIN_ROWS = 50000
+PARALLEL_SUBTREE_MIN_ROWS = 20000
+READ_CHUNK_ROWS = 8192
+CACHE_LOAD_ATTEMPTS = 3
+SHUFFLE_MEMORY_BUDGET = 256 * 1024**2
+MODEL_PATH = "../tree.model"
+OTHER_BIN_VALUE = "<other>"
+FOREST_SIZE = 20
+FOREST_ATTRS_RATIO = 0.8
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8080
+SERVICE_MAX_BATCH = 1024
+SERVICE_MAX_DELAY = 0.005
+SERVICE_LATENCY_WINDOW = 10000
@@ -0,0 +1,651 @@
+from typing import Iterable
+import json
+import os
+import numpy as np
+from config import DECISION_COLUMN_SYMBOL, OTHER_BIN_VALUE
+
+
+def get_code_dtype(vocab_size: int) -> np.dtype:
+    """
+    Function returning smallest signed integer type able to hold codes of a vocabulary
+    (negative codes are reserved for values missing in vocabulary).
+
+    Parameters:
+        vocab_size (int): number of values in vocabulary
+
+    Returns:
+        dtype (np.dtype): integer type for column codes
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if vocab_size <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def encode_column(column: Iterable[str]) -> tuple[list[str], np.ndarray]:
+    """
+    Function encoding column of values into integer codes.
+
+    Parameters:
+        column (Iterable[str]): column values
+
+    Returns:
+        encoded (tuple[list[str], np.ndarray]): sorted vocabulary and array of codes pointing into it
+    """
+    column = list(column)
+    vocab = sorted(set(column))
+    index = {val: code for code, val in enumerate(vocab)}
+    codes = np.fromiter(
+        (index[val] for val in column), dtype=get_code_dtype(len(vocab)), count=len(column)
+    )
+    return vocab, codes
+
+
+def count_codes(codes: np.ndarray, weights: np.ndarray | None = None, minlength: int = 0) -> np.ndarray:
+    """
+    Function counting occurrences of codes, every occurrence is counted with weight of its row.
+
+    Parameters:
+        codes (np.ndarray): non-negative integer codes
+
+        weights (np.ndarray | None): weights of rows (see Dataset.compress), every row counted once if None
+
+        minlength (int): minimal length of returned counts
+
+    Returns:
+        counts (np.ndarray): count of every code as integers
+    """
+    counts = np.bincount(codes, weights, minlength)
+    return counts if weights is None else counts.astype(np.int64)
+
+
+def parse_numeric(vocab: list[str]) -> np.ndarray:
+    """
+    Function converting vocabulary of numeric attribute into numbers.
+
+    Parameters:
+        vocab (list[str]): vocabulary of attribute
+
+    Returns:
+        values (np.ndarray): numbers in order of vocabulary
+    """
+    try:
+        return np.array([float(val) for val in vocab], dtype=np.float64)
+    except ValueError as e:
+        raise Exception(f"Attribute is not numeric: {e}")
+
+
+def get_threshold_vals(threshold: float) -> tuple[str, str]:
+    """
+    Function returning values of children of node splitting numeric attribute by threshold.
+
+    Parameters:
+        threshold (float): split threshold
+
+    Returns:
+        vals (tuple[str, str]): values of children with attribute lower or equal and greater than threshold
+    """
+    return f"<= {float(threshold)!r}", f"> {float(threshold)!r}"
+
+
+class Dataset:
+    """
+    Columnar dataset, every column is stored as an array of integer codes pointing
+    into a sorted vocabulary of column values (so order of codes is order of values).
+    Numeric attributes additionally keep numbers of their vocabulary (see set_numeric).
+    Compressed dataset keeps distinct rows with numbers of their occurrences as weights (see compress).
+    Binned dataset keeps values of categorical attributes which weren't put into OTHER_BIN_VALUE
+    bin (see apply_bins), so trees built from it can bin raw values when predicting.
+    """
+
+    __slots__ = ("codes", "vocab", "numeric", "weights", "bins")
+
+    def __init__(
+        self,
+        codes: dict[str, np.ndarray],
+        vocab: dict[str, list[str]],
+        numeric: dict[str, np.ndarray] | None = None,
+        weights: np.ndarray | None = None,
+        bins: dict[str, list[str]] | None = None,
+    ):
+        self.codes = codes
+        self.vocab = vocab
+        self.numeric = numeric if numeric is not None else {}
+        self.weights = weights
+        self.bins = bins if bins is not None else {}
+
+    @staticmethod
+    def from_dict(data: dict[str, list[str]]) -> "Dataset":
+        """
+        Function encoding dataset dictionary.
+
+        Parameters:
+            data (dict[str, list[str]]): dataset as dictionary
+
+        Returns:
+            dataset (Dataset): encoded dataset
+        """
+        codes, vocab = {}, {}
+        for attr, column in data.items():
+            vocab[attr], codes[attr] = encode_column(column)
+        return Dataset(codes, vocab)
+
+    def set_numeric(self, attrs: Iterable[str]) -> None:
+        """
+        Method marking attributes as numeric, they are split by thresholds
+        instead of by every value when tree is built.
+
+        Parameters:
+            attrs (Iterable[str]): names of numeric attributes
+        """
+        for attr in attrs:
+            if attr == DECISION_COLUMN_SYMBOL:
+                raise Exception("Decision column cannot be numeric")
+            self.numeric[attr] = parse_numeric(self.vocab[attr])
+
+    def compress(self) -> "Dataset":
+        """
+        Method collapsing identical rows into one row weighted by number of its occurrences
+        (distinct rows keep order of their first occurrences). Counts of weighted rows are equal
+        to counts of rows of uncompressed dataset, so the same tree is built from both datasets.
+        Compressed dataset can't be split by rows positions (see get_data_rows), datasets should be
+        compressed after they are split into training and testing datasets.
+
+        Returns:
+            dataset (Dataset): dataset with distinct rows and their weights
+        """
+        if not len(self):
+            return self
+        keys, multiplier = np.zeros(len(self), dtype=np.int64), 1
+        for attr, codes in self.codes.items():
+            keys += codes.astype(np.int64) * multiplier
+            multiplier *= len(self.vocab[attr])
+            if multiplier >= 2**63:  # rows don't fit into 64-bit keys
+                keys = None
+                break
+        if keys is None:
+            matrix = np.column_stack([codes.astype(np.int64) for codes in self.codes.values()])
+            _, first, inverse = np.unique(matrix, axis=0, return_index=True, return_inverse=True)
+        else:
+            _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        order = np.argsort(first)  # distinct rows are kept in order of first occurrences
+        first, ranks = first[order], np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(len(order))
+        weights = count_codes(ranks[inverse.reshape(-1)], self.weights, len(first))
+        return Dataset(
+            {attr: codes[first] for attr, codes in self.codes.items()}, self.vocab, self.numeric, weights, self.bins
+        )
+
+    def get_weights(self, rows: np.ndarray | None = None) -> np.ndarray | None:
+        """
+        Method returning weights of rows.
+
+        Parameters:
+            rows (np.ndarray | None): indexes of rows, all rows if None
+
+        Returns:
+            weights (np.ndarray | None): weights of rows, None if dataset is not compressed
+        """
+        if self.weights is None or rows is None:
+            return self.weights
+        return self.weights[rows]
+
+    def count_rows(self, rows: np.ndarray | None = None) -> int:
+        """
+        Method counting rows with their weights (rows of uncompressed dataset).
+
+        Parameters:
+            rows (np.ndarray | None): indexes of rows to count, all rows if None
+
+        Returns:
+            rows_count (int): number of rows
+        """
+        if self.weights is None:
+            return len(self) if rows is None else len(rows)
+        return int(self.get_weights(rows).sum())  # type: ignore
+
+    def get_numeric_candidates(self) -> list[str]:
+        """
+        Method finding attributes with all values being numbers.
+
+        Returns:
+            attr_names (list[str]): names of attributes which can be numeric
+        """
+        candidates = []
+        for attr in self.keys()[:-1]:
+            try:
+                parse_numeric(self.vocab[attr])
+            except Exception:
+                continue
+            candidates.append(attr)
+        return candidates
+
+    def get_values(self, attr: str) -> np.ndarray:
+        """
+        Method returning numbers of attribute vocabulary (parsed if attribute isn't marked numeric).
+
+        Parameters:
+            attr (str): name of attribute
+
+        Returns:
+            values (np.ndarray): numbers in order of vocabulary
+        """
+        if attr in self.numeric:
+            return self.numeric[attr]
+        return parse_numeric(self.vocab[attr])
+
+    def get_bins(self, max_bins: int) -> dict[str, list[str]]:
+        """
+        Method choosing bins of attributes with more than max_bins values. Numeric attributes
+        get quantile bins (every bin is represented by its largest value), categorical
+        attributes keep max_bins - 1 most frequent values and the rest is put into OTHER_BIN_VALUE bin.
+
+        Parameters:
+            max_bins (int): maximal number of values of an attribute
+
+        Returns:
+            bins (dict[str, list[str]]): key - attribute name, value - values representing its bins
+        """
+        if max_bins < 2:
+            raise Exception("max_bins cannot be smaller than 2")
+        bins = {}
+        for attr in self.keys()[:-1]:
+            counts = count_codes(self.codes[attr], self.weights, len(self.vocab[attr]))
+            present = np.flatnonzero(counts)
+            if len(present) <= max_bins:
+                continue
+            if attr not in self.numeric:
+                top = present[np.argsort(-counts[present], kind="stable")[:max_bins - 1]]
+                bins[attr] = [self.vocab[attr][code] for code in top.tolist()]
+                continue
+            present = present[np.argsort(self.numeric[attr][present], kind="stable")]
+            present_counts = counts[present]
+            starts = np.cumsum(present_counts) - present_counts
+            bin_ids = starts * max_bins // int(present_counts.sum())
+            last = np.flatnonzero(np.append(bin_ids[1:] != bin_ids[:-1], True))
+            bins[attr] = [self.vocab[attr][code] for code in present[last].tolist()]
+        return bins
+
+    def __get_binned_vals(self, attr: str, bin_vals: list[str]) -> list[str]:
+        """
+        Method finding bins of attribute vocabulary values.
+
+        Parameters:
+            attr (str): name of attribute
+
+            bin_vals (list[str]): values representing bins of attribute
+
+        Returns:
+            binned_vals (list[str]): bin value for every vocabulary value
+        """
+        if attr in self.numeric:
+            edges = sorted(bin_vals, key=float)
+            positions = np.searchsorted(parse_numeric(edges), self.numeric[attr], side="left")
+            return [edges[i] for i in np.minimum(positions, len(edges) - 1).tolist()]
+        kept = set(bin_vals)
+        return [val if val in kept else OTHER_BIN_VALUE for val in self.vocab[attr]]
+
+    def apply_bins(self, bins: dict[str, list[str]]) -> "Dataset":
+        """
+        Method creating dataset with values replaced by their bins (see get_bins). Numeric value
+        is replaced by the smallest bin value not lower than it (the largest bin value if there is none),
+        categorical value not kept in bins is replaced by OTHER_BIN_VALUE (kept values are remembered in bins).
+
+        Parameters:
+            bins (dict[str, list[str]]): key - attribute name, value - values representing its bins
+
+        Returns:
+            dataset (Dataset): binned dataset
+        """
+        codes, vocab, kept = dict(self.codes), dict(self.vocab), dict(self.bins)
+        for attr, bin_vals in bins.items():
+            if attr not in self.numeric:
+                kept[attr] = sorted(bin_vals)
+            binned_vals = self.__get_binned_vals(attr, bin_vals)
+            vocab[attr] = sorted(set(binned_vals))
+            index = {val: code for code, val in enumerate(vocab[attr])}
+            remap = np.array([index[val] for val in binned_vals], dtype=get_code_dtype(len(vocab[attr])))
+            codes[attr] = remap[self.codes[attr]] if len(remap) else self.codes[attr]
+        dataset = Dataset(codes, vocab, weights=self.weights, bins=kept)
+        dataset.set_numeric(self.numeric.keys())
+        return dataset
+
+    def get_bins_loss(self, bins: dict[str, list[str]]) -> dict[str, dict[str, int | float]]:
+        """
+        Method measuring how much binning changes dataset.
+
+        Parameters:
+            bins (dict[str, list[str]]): key - attribute name, value - values representing its bins
+
+        Returns:
+            loss (dict[str, dict[str, int | float]]): key - attribute name, value - number of values before ("values")
+            and after binning ("bins") and share of rows with value changed by binning ("changed_rows")
+        """
+        loss = {}
+        for attr, bin_vals in bins.items():
+            binned_vals = np.array(self.__get_binned_vals(attr, bin_vals), dtype=object)
+            counts = count_codes(self.codes[attr], self.weights, len(self.vocab[attr]))
+            changed = binned_vals != np.array(self.vocab[attr], dtype=object)
+            loss[attr] = {
+                "values": int(np.count_nonzero(counts)),
+                "bins": len(set(binned_vals[counts > 0].tolist())),
+                "changed_rows": float(counts[changed].sum() / max(self.count_rows(), 1)),
+            }
+        return loss
+
+    @staticmethod
+    def concat(datasets: list["Dataset"]) -> "Dataset":
+        """
+        Function concatenating datasets with the same attributes, vocabularies are merged.
+        Result is compressed if any of datasets is compressed (rows are not collapsed again),
+        bins are taken from the first dataset.
+
+        Parameters:
+            datasets (list[Dataset]): datasets to be concatenated
+
+        Returns:
+            dataset (Dataset): concatenated dataset
+        """
+        codes, vocab = {}, {}
+        for attr in datasets[0].keys():
+            vocab[attr] = sorted(set().union(*(ds.vocab[attr] for ds in datasets)))
+            index = {val: code for code, val in enumerate(vocab[attr])}
+            dtype = get_code_dtype(len(vocab[attr]))
+            codes[attr] = np.concatenate(
+                [
+                    np.array([index[val] for val in ds.vocab[attr]], dtype=dtype)[ds.codes[attr]]
+                    if ds.vocab[attr]
+                    else np.empty(0, dtype=dtype)
+                    for ds in datasets
+                ]
+            )
+        weights = None
+        if any(ds.weights is not None for ds in datasets):
+            weights = np.concatenate(
+                [np.ones(len(ds), dtype=np.int64) if ds.weights is None else ds.weights for ds in datasets]
+            )
+        dataset = Dataset(codes, vocab, weights=weights, bins=datasets[0].bins)
+        dataset.set_numeric(datasets[0].numeric.keys())
+        return dataset
+
+    def save(self, path: str) -> None:
+        """
+        Method saving dataset to a directory, every column is saved as .npy file
+        and vocabularies as vocab.json (weights of compressed dataset as weights.npy).
+
+        Parameters:
+            path (str): path to directory (created if missing)
+        """
+        os.makedirs(path, exist_ok=True)
+        for i, attr in enumerate(self.keys()):
+            np.save(os.path.join(path, f"{i}.npy"), self.codes[attr])
+        if self.weights is not None:
+            np.save(os.path.join(path, "weights.npy"), self.weights)
+        with open(os.path.join(path, "vocab.json"), "w") as file:
+            json.dump(
+                {
+                    "headers": self.keys(),
+                    "vocab": self.vocab,
+                    "numeric": list(self.numeric.keys()),
+                    "bins": self.bins,
+                },
+                file,
+            )
+
+    @staticmethod
+    def load(path: str, use_mmap: bool = True) -> "Dataset":
+        """
+        Function loading dataset saved with Dataset.save.
+
+        Parameters:
+            path (str): path to directory with saved dataset
+
+            use_mmap (bool): memory map columns instead of reading them
+
+        Returns:
+            dataset (Dataset): loaded dataset
+        """
+        with open(os.path.join(path, "vocab.json"), "r") as file:
+            saved = json.load(file)
+        codes = {
+            attr: np.load(os.path.join(path, f"{i}.npy"), mmap_mode="r" if use_mmap else None)
+            for i, attr in enumerate(saved["headers"])
+        }
+        weights = None
+        if os.path.exists(os.path.join(path, "weights.npy")):
+            weights = np.load(os.path.join(path, "weights.npy"), mmap_mode="r" if use_mmap else None)
+        dataset = Dataset(codes, saved["vocab"], weights=weights, bins=saved.get("bins"))
+        dataset.set_numeric(saved.get("numeric", []))
+        return dataset
+
+    def to_dict(self) -> dict[str, list[str]]:
+        """
+        Method decoding dataset into dictionary (rows of compressed dataset are not repeated).
+
+        Returns:
+            data (dict[str, list[str]]): dataset as dictionary
+        """
+        return {attr: self[attr] for attr in self.keys()}
+
+    def keys(self) -> list[str]:
+        """
+        Method returning names of all attributes in dataset.
+
+        Returns:
+            attr_names (list[str]): list of dataset attributes
+        """
+        return list(self.codes.keys())
+
+    def __len__(self) -> int:
+        return len(self.codes[DECISION_COLUMN_SYMBOL])
+
+    def __getitem__(self, attr: str) -> list[str]:
+        return np.array(self.vocab[attr], dtype=object)[self.codes[attr]].tolist()
+
+    def value_counts(self, attr: str) -> dict[str, int]:
+        """
+        Method counting occurrences of values of an attribute (rows are counted with weights).
+
+        Parameters:
+            attr (str): name of attribute
+
+        Returns:
+            counts (dict[str, int]): key - value found in column (sorted), value - its count
+        """
+        counts = count_codes(self.codes[attr], self.weights, len(self.vocab[attr]))
+        return {
+            self.vocab[attr][code]: int(count)
+            for code, count in enumerate(counts)
+            if count
+        }
+
+    def unique_values(self, attr: str, rows: np.ndarray | None = None) -> list[str]:
+        """
+        Method returning sorted unique values of an attribute.
+
+        Parameters:
+            attr (str): name of attribute
+
+            rows (np.ndarray | None): indexes of rows to look into, all rows if None
+
+        Returns:
+            unique_vals (list[str]): values found in column
+        """
+        column = self.codes[attr] if rows is None else self.codes[attr][rows]
+        return [self.vocab[attr][code] for code in np.unique(column)]
+
+    def take(self, rows: np.ndarray) -> "Dataset":
+        """
+        Method creating dataset from chosen rows, vocabularies are shared.
+
+        Parameters:
+            rows (np.ndarray): indexes or boolean mask of rows
+
+        Returns:
+            dataset (Dataset): dataset with chosen rows
+        """
+        return Dataset(
+            {attr: codes[rows] for attr, codes in self.codes.items()},
+            self.vocab,
+            self.numeric,
+            self.get_weights(rows),
+            self.bins,
+        )
+
+    def select(self, attrs: list[str]) -> "Dataset":
+        """
+        Method creating dataset with chosen attributes (and decision column) without copying columns.
+
+        Parameters:
+            attrs (list[str]): names of attributes in order of new dataset
+
+        Returns:
+            dataset (Dataset): dataset with chosen attributes
+        """
+        attrs = [*attrs, DECISION_COLUMN_SYMBOL]
+        return Dataset(
+            {attr: self.codes[attr] for attr in attrs},
+            {attr: self.vocab[attr] for attr in attrs},
+            {attr: self.numeric[attr] for attr in attrs if attr in self.numeric},
+            self.weights,
+            {attr: self.bins[attr] for attr in attrs if attr in self.bins},
+        )
+
+    def slice(self, start: int, stop: int) -> "Dataset":
+        """
+        Method creating dataset from range of rows without copying columns.
+
+        Parameters:
+            start (int): subset start index
+
+            stop (int): subset stop index
+
+        Returns:
+            dataset (Dataset): dataset with rows from start to stop
+        """
+        return Dataset(
+            {attr: codes[start:stop] for attr, codes in self.codes.items()},
+            self.vocab,
+            self.numeric,
+            None if self.weights is None else self.weights[start:stop],
+            self.bins,
+        )
+
+    def row(self, index: int) -> dict[str, list[str]]:
+        """
+        Method decoding single row of dataset.
+
+        Parameters:
+            index (int): index of row
+
+        Returns:
+            row (dict[str, list[str]]): row as dataset dictionary
+        """
+        return {
+            attr: [self.vocab[attr][codes[index]]] for attr, codes in self.codes.items()
+        }
+
+    def split_rows(
+        self, attr: str, rows: np.ndarray, threshold: float | None = None
+    ) -> dict[str, np.ndarray]:
+        """
+        Method splitting rows indexes by attribute values (or by threshold of numeric
+        attribute) without copying columns. Indexes are reordered in place (stably) so that
+        rows of every value are contiguous and returned groups are views of passed array.
+
+        Parameters:
+            attr (str): name of attribute to split rows by
+
+            rows (np.ndarray): indexes of rows to split (reordered in place)
+
+            threshold (float | None): threshold to split numeric attribute by (see get_threshold_vals),
+            rows are split by every value if None
+
+        Returns:
+            split_rows (dict[str, np.ndarray]): key - attribute value (sorted), value - indexes of rows with that value
+        """
+        column = self.codes[attr][rows]
+        if threshold is None:
+            vals = self.vocab[attr]
+        else:
+            vals = get_threshold_vals(threshold)
+            column = (self.get_values(attr)[column] > threshold).view(np.int8)
+        order = np.argsort(column, kind="stable")
+        rows[:] = rows[order]
+        codes, starts = np.unique(column[order], return_index=True)
+        stops = [*starts[1:].tolist(), len(rows)]
+        return {
+            vals[code]: rows[start:stop]
+            for code, start, stop in zip(codes.tolist(), starts.tolist(), stops)
+        }
+
+    def split(
+        self, attr: str, split_vals: Iterable[str] | None = None
+    ) -> dict[str, "Dataset"]:
+        """
+        Method splitting dataset by attribute values.
+
+        Parameters:
+            attr (str): name of attribute to split dataset by
+
+            split_vals (Iterable[str] | None): values to split dataset by, all values found in column if None
+
+        Returns:
+            split_data (dict[str, Dataset]): key - attribute value, value - rows with that value
+        """
+        if split_vals is None:
+            split_vals = self.unique_values(attr)
+        index = {val: code for code, val in enumerate(self.vocab[attr])}
+        column = self.codes[attr]
+        return {
+            sv: self.take(column == index.get(sv, -1)) for sv in split_vals
+        }
+
+
+class DatasetEncoder:
+    """
+    Incremental encoder of dataset rows. Values get provisional codes in order of
+    appearance, codes are remapped to sorted vocabularies when dataset is built.
+    """
+
+    __slots__ = ("headers", "indexes", "chunks")
+
+    def __init__(self, headers: list[str]):
+        self.headers = headers
+        self.indexes: list[dict[str, int]] = [{} for _ in headers]
+        self.chunks: list[list[np.ndarray]] = [[] for _ in headers]
+
+    def add_rows(self, rows: list[list[str]]) -> None:
+        """
+        Method encoding chunk of rows.
+
+        Parameters:
+            rows (list[list[str]]): data rows as lists of strings
+        """
+        for index, chunks, column in zip(self.indexes, self.chunks, zip(*rows)):
+            chunks.append(
+                np.fromiter(
+                    (index.setdefault(val, len(index)) for val in column),
+                    dtype=np.int32,
+                    count=len(column),
+                )
+            )
+
+    def build(self) -> Dataset:
+        """
+        Method building dataset from encoded rows.
+
+        Returns:
+            dataset (Dataset): encoded dataset
+        """
+        codes, vocab = {}, {}
+        for header, index, chunks in zip(self.headers, self.indexes, self.chunks):
+            vocab[header] = sorted(index)
+            sorted_index = {val: code for code, val in enumerate(vocab[header])}
+            remap = np.array(
+                [sorted_index[val] for val in index], dtype=get_code_dtype(len(index))
+            )
+            codes[header] = (
+                remap[np.concatenate(chunks)] if chunks else np.empty(0, dtype=remap.dtype)
+            )
+        return Dataset(codes, vocab)
@@ -0,0 +1,144 @@
+from math import ceil
+import numpy as np
+from config import DECISION_COLUMN_SYMBOL, FOREST_ATTRS_RATIO, FOREST_SIZE, JOBS
+from compiled_tree import CompiledTree
+from dataset import Dataset, count_codes
+from node import Node
+from utils import get_attr_names, get_classes_index, get_executor, get_test_stats
+
+
+class RandomForest:
+    """
+    Ensemble of decision trees (Node.build_tree_struct) trained on bootstrap samples of rows
+    and random subsets of attributes, decision is made by majority vote of trees.
+    Trees are kept compiled (see CompiledTree).
+    """
+
+    __slots__ = ("size", "attrs_ratio", "seed", "classes", "trees")
+
+    def __init__(self, size: int = FOREST_SIZE, attrs_ratio: float = FOREST_ATTRS_RATIO, seed: int | None = None):
+        self.size = size
+        self.attrs_ratio = attrs_ratio
+        self.seed = seed
+        self.classes: list[str] = []
+        self.trees: list[CompiledTree] = []
+
+    def fit(self, data: dict[str, list[str]] | Dataset, jobs: int = JOBS) -> "RandomForest":
+        """
+        Method training trees of the forest. With jobs > 1 every worker process gets
+        dataset once and trains its share of trees, trained forest doesn't depend on jobs.
+
+        Parameters:
+            data (dict[str, list[str]] | Dataset): training dataset as dictionary or encoded dataset
+
+            jobs (int): number of worker processes
+
+        Returns:
+            forest (RandomForest): trained forest
+        """
+        if isinstance(data, dict):
+            data = Dataset.from_dict(data)
+        self.classes = data.vocab[DECISION_COLUMN_SYMBOL]
+        attrs_count = max(1, ceil(len(get_attr_names(data)[:-1]) * self.attrs_ratio))
+        seeds = np.random.SeedSequence(self.seed).spawn(self.size)
+        if jobs > 1:
+            futures = [
+                get_executor(jobs).submit(build_forest_trees, data, seeds[i::jobs], attrs_count)
+                for i in range(min(jobs, self.size))
+            ]
+            shares = [future.result() for future in futures]
+            self.trees = [shares[i % len(shares)][i // len(shares)] for i in range(self.size)]
+        else:
+            self.trees = build_forest_trees(data, seeds, attrs_count)
+        return self
+
+    def predict_codes(self, data: dict[str, list[str]] | Dataset) -> np.ndarray:
+        """
+        Method predicting decisions for all dataset rows by majority vote of trees
+        (first class in sorted order wins a tie).
+
+        Parameters:
+            data (dict[str, list[str]] | Dataset): dataset as dictionary or encoded dataset
+
+        Returns:
+            decisions (np.ndarray): codes of decisions (indexes of classes, -1 if no tree made decision)
+        """
+        if isinstance(data, dict):
+            data = Dataset.from_dict(data)
+        class_index = {class_: i for i, class_ in enumerate(self.classes)}
+        votes = np.zeros((len(data), len(self.classes)), dtype=np.int32)
+        rows = np.arange(len(data))
+        for tree in self.trees:
+            remap = np.array([class_index[class_] for class_ in tree.classes] + [-1], dtype=np.int64)
+            decisions = remap[tree.predict_codes(data)]
+            voted = decisions >= 0
+            votes[rows[voted], decisions[voted]] += 1
+        return np.where(votes.any(axis=1), votes.argmax(axis=1), -1)
+
+    def predict_batch(self, data: dict[str, list[str]] | Dataset) -> list[str | None]:
+        """
+        Method predicting decisions for all dataset rows by majority vote of trees.
+
+        Parameters:
+            data (dict[str, list[str]] | Dataset): dataset as dictionary or encoded dataset
+
+        Returns:
+            decisions (list[str | None]): decisions made with the forest
+        """
+        return np.array([*self.classes, None], dtype=object)[self.predict_codes(data)].tolist()
+
+    def test_tree(
+        self, test_ds: dict[str, list[str]] | Dataset, d_classes: list[str]
+    ) -> dict[str, list[int]]:
+        """
+        Method testing forest classification with testing dataset (see Node.test_tree).
+
+        Parameters:
+            test_ds (dict[str, list[str]] | Dataset): testing dataset
+
+            d_classes (list[str]): list of decision classes
+
+        Returns:
+            results (dict[str, list[int]]): TP, FP, FN, TN values for each class
+        """
+        if isinstance(test_ds, dict):
+            test_ds = Dataset.from_dict(test_ds)
+        d_classes = list(dict.fromkeys(d_classes))
+        actual = get_classes_index(test_ds.vocab[DECISION_COLUMN_SYMBOL], d_classes)[
+            test_ds.codes[DECISION_COLUMN_SYMBOL]
+        ]
+        preds = get_classes_index(self.classes, d_classes)[self.predict_codes(test_ds)]
+        return get_test_stats(actual, preds, d_classes, test_ds.weights)
+
+
+def build_forest_trees(
+    data: Dataset, seeds: list[np.random.SeedSequence], attrs_count: int
+) -> list[CompiledTree]:
+    """
+    Function training forest trees, every tree is trained on bootstrap sample of rows
+    (of rows of uncompressed dataset if dataset is compressed) and random subset of attributes drawn with its own seed.
+
+    Parameters:
+        data (Dataset): training dataset
+
+        seeds (list[np.random.SeedSequence]): seeds of trees
+
+        attrs_count (int): number of attributes of every tree
+
+    Returns:
+        trees (list[CompiledTree]): compiled trees
+    """
+    attrs = get_attr_names(data)[:-1]
+    trees = []
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        tree_attrs = [attrs[i] for i in np.sort(rng.choice(len(attrs), attrs_count, replace=False))]
+        if data.weights is None:
+            sample = data.select(tree_attrs).take(rng.integers(0, len(data), len(data)))
+        else:  # rows are drawn with their weights, drawn rows stay compressed
+            rows_count = data.count_rows()
+            draws = count_codes(rng.choice(len(data), rows_count, p=data.weights / rows_count), minlength=len(data))
+            sample = data.select(tree_attrs).take(np.flatnonzero(draws))
+            sample.weights = draws[draws > 0]
+        trees.append(Node.build_tree_struct(Node(), sample).compile())  # type: ignore
+    return trees
@@ -0,0 +1,351 @@
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+from typing import Callable, Iterator
+import json
+import os
+import sys
+import threading
+import tracemalloc
+import utils
+from dataset import Dataset
+from node import Node
+from utils import get_rows_count
+
+# phase name, owner (module or class), attribute name, position and name of dataset argument
+# and position and name of rows indexes argument (None - rows of returned dataset are counted)
+INSTRUMENTED = (
+    ("read_data", utils, "read_data", None),
+    ("read_dataset", utils, "read_dataset", None),
+    ("get_max_ratio_attr", utils, "get_max_ratio_attr", (0, "data", 1, "rows")),
+    ("get_best_split", utils, "get_best_split", (0, "data", 1, "rows")),
+    ("split_dict", utils, "split_dict", (0, "data", None, None)),
+    ("split_rows", Dataset, "split_rows", (0, "self", 2, "rows")),
+    ("build_tree_struct", Node, "build_tree_struct", (1, "data", 3, "rows")),
+    ("prunev2", Node, "prunev2", (1, "v_dataset", None, None)),
+    ("test_tree", Node, "test_tree", (1, "test_ds", None, None)),
+)
+
+
+class _Recorder:
+    """
+    Statistics of instrumented calls collected between enable and disable.
+    """
+
+    __slots__ = (
+        "phases",
+        "active",
+        "events",
+        "trace",
+        "memory",
+        "started_tracing",
+        "start",
+        "nodes_created",
+        "peak_memory",
+        "call_peaks",
+    )
+
+    def __init__(self, trace: bool, memory: bool):
+        self.phases: dict[str, dict] = {}
+        self.active: dict[str, int] = {}
+        self.events: list[dict] = []
+        self.trace = trace
+        self.memory = memory
+        self.started_tracing = memory and not tracemalloc.is_tracing()
+        self.start = perf_counter()
+        self.nodes_created = 0
+        self.peak_memory = 0
+        self.call_peaks: list[int] = []  # peak memory of running calls before tracemalloc peak was last reset
+
+    def enter(self, phase: str) -> None:
+        if self.memory:
+            self.__add_peak(tracemalloc.get_traced_memory()[1])
+            self.call_peaks.append(0)
+            tracemalloc.reset_peak()
+        self.active[phase] = self.active.get(phase, 0) + 1
+
+    def __add_peak(self, peak: int) -> None:
+        """
+        Method adding peak memory to innermost running call (or whole run outside of calls).
+
+        Parameters:
+            peak (int): peak of traced memory (bytes)
+        """
+        if self.call_peaks:
+            self.call_peaks[-1] = max(self.call_peaks[-1], peak)
+        else:
+            self.peak_memory = max(self.peak_memory, peak)
+
+    def exit(self, phase: str, start: float, end: float, rows: int | None) -> None:
+        self.active[phase] -= 1
+        stats = self.phases.setdefault(
+            phase, {"calls": 0, "time": 0.0, "rows": 0, "min_rows": None, "max_rows": None, "peak_memory": 0}
+        )
+        stats["calls"] += 1
+        if not self.active[phase]:  # recursive calls are counted once in time
+            stats["time"] += end - start
+        if rows is not None:
+            stats["rows"] += rows
+            stats["min_rows"] = rows if stats["min_rows"] is None else min(stats["min_rows"], rows)
+            stats["max_rows"] = rows if stats["max_rows"] is None else max(stats["max_rows"], rows)
+        if self.memory:
+            call_peak = max(self.call_peaks.pop(), tracemalloc.get_traced_memory()[1])
+            stats["peak_memory"] = max(stats["peak_memory"], call_peak)
+            self.__add_peak(call_peak)  # memory of nested call is memory of calls running it too
+        if self.trace:
+            self.events.append(
+                {
+                    "name": phase,
+                    "ph": "X",
+                    "ts": (start - self.start) * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                    "args": {} if rows is None else {"rows": rows},
+                }
+            )
+
+
+_recorder: _Recorder | None = None
+_patches: list[tuple[object, str, object]] = []
+
+
+def _get_arg(args: tuple, kwargs: dict, index: int | None, name: str | None) -> object:
+    """
+    Function getting argument of a call by position or name.
+
+    Parameters:
+        args (tuple): positional arguments
+
+        kwargs (dict): keyword arguments
+
+        index (int | None): position of argument
+
+        name (str | None): name of argument
+
+    Returns:
+        arg (object): argument value, None if it wasn't passed
+    """
+    if index is None:
+        return None
+    if index < len(args):
+        return args[index]
+    return kwargs.get(name)  # type: ignore
+
+
+def _count_rows(args: tuple, kwargs: dict, rows_spec: tuple) -> int | None:
+    """
+    Function counting rows processed by a call from its arguments.
+
+    Parameters:
+        args (tuple): positional arguments
+
+        kwargs (dict): keyword arguments
+
+        rows_spec (tuple): position and name of dataset argument, position and name of rows indexes argument
+
+    Returns:
+        rows (int | None): number of processed rows, None if it can't be found
+    """
+    rows = _get_arg(args, kwargs, *rows_spec[2:])
+    if rows is not None:
+        return len(rows)  # type: ignore
+    data = _get_arg(args, kwargs, *rows_spec[:2])
+    return get_rows_count(data) if data else None  # type: ignore
+
+
+def _wrap(func: Callable, phase: str, rows_spec: tuple | None) -> Callable:
+    """
+    Function wrapping a function so its calls are recorded as a phase.
+
+    Parameters:
+        func (Callable): instrumented function
+
+        phase (str): phase name
+
+        rows_spec (tuple | None): how to count processed rows (see INSTRUMENTED)
+
+    Returns:
+        wrapper (Callable): recording function
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        recorder = _recorder
+        if recorder is None:  # function called after disable through a saved reference
+            return func(*args, **kwargs)
+        rows = None if rows_spec is None else _count_rows(args, kwargs, rows_spec)
+        recorder.enter(phase)
+        start = perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            recorder.exit(phase, start, perf_counter(), rows)
+            raise
+        end = perf_counter()
+        if rows_spec is None:
+            rows = get_rows_count(result)
+        recorder.exit(phase, start, end, rows)
+        return result
+
+    return wrapper
+
+
+def _patch(owner: object, name: str, value: object) -> None:
+    """
+    Function replacing attribute and remembering original value.
+
+    Parameters:
+        owner (object): module or class
+
+        name (str): attribute name
+
+        value (object): new value
+    """
+    _patches.append((owner, name, vars(owner)[name]))
+    setattr(owner, name, value)
+
+
+def enable_instrumentation(trace: bool = True, memory: bool = True) -> None:
+    """
+    Function enabling instrumentation of tree pipeline. Instrumented functions are replaced
+    with recording wrappers (also in modules which imported them), so nothing is
+    recorded and there is no overhead while instrumentation is disabled. Only calls made
+    in this process are recorded (not in worker processes of jobs > 1).
+
+    Parameters:
+        trace (bool): record every call for Chrome trace (see save_trace)
+
+        memory (bool): measure peak memory with tracemalloc
+    """
+    global _recorder
+    if _recorder is not None:
+        raise Exception("Instrumentation is already enabled")
+    _recorder = _Recorder(trace, memory)
+    if _recorder.started_tracing:
+        tracemalloc.start()
+    for phase, owner, name, rows_spec in INSTRUMENTED:
+        original = vars(owner)[name]
+        if isinstance(original, staticmethod):
+            _patch(owner, name, staticmethod(_wrap(original.__func__, phase, rows_spec)))
+            continue
+        wrapper = _wrap(original, phase, rows_spec)
+        if isinstance(owner, type):
+            _patch(owner, name, wrapper)
+            continue
+        for module in list(sys.modules.values()):
+            if getattr(module, name, None) is original:
+                _patch(module, name, wrapper)
+    original_init = Node.__init__
+
+    @wraps(original_init)
+    def init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        if _recorder is not None:
+            _recorder.nodes_created += 1
+
+    _patch(Node, "__init__", init)
+
+
+def disable_instrumentation() -> dict:
+    """
+    Function disabling instrumentation and restoring original functions.
+
+    Returns:
+        report (dict): statistics recorded since instrumentation was enabled (see get_report)
+    """
+    global _recorder
+    if _recorder is None:
+        raise Exception("Instrumentation is not enabled")
+    report = get_report()
+    while _patches:
+        owner, name, original = _patches.pop()
+        setattr(owner, name, original)
+    if _recorder.started_tracing:
+        tracemalloc.stop()
+    _recorder = None
+    return report
+
+
+def get_report() -> dict:
+    """
+    Function returning statistics recorded since instrumentation was enabled.
+
+    Returns:
+        report (dict): wall time, nodes created, peak memory (bytes, 0 if not measured) and
+        for every phase: number of calls, wall time (recursive calls counted once), processed rows
+        (total, min and max per call) and peak memory of calls (nested calls included)
+    """
+    if _recorder is None:
+        raise Exception("Instrumentation is not enabled")
+    peak_memory = max([_recorder.peak_memory, *_recorder.call_peaks])
+    if _recorder.memory:
+        peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+    return {
+        "time": perf_counter() - _recorder.start,
+        "nodes_created": _recorder.nodes_created,
+        "peak_memory": peak_memory,
+        "phases": {phase: dict(stats) for phase, stats in _recorder.phases.items()},
+    }
+
+
+def format_report(report: dict) -> str:
+    """
+    Function formatting report as text table.
+
+    Parameters:
+        report (dict): report returned by get_report
+
+    Returns:
+        report_text (str): report as text
+    """
+    lines = [
+        f"Time: {report['time']:.3f} s, nodes created: {report['nodes_created']}, "
+        f"peak memory: {report['peak_memory'] / 1024**2:.1f} MiB",
+        f"{'phase':<20}{'calls':>10}{'time [s]':>12}{'rows':>14}{'rows/call':>12}{'max rows':>12}{'peak [MiB]':>12}",
+    ]
+    for phase, stats in sorted(report["phases"].items(), key=lambda item: -item[1]["time"]):
+        lines.append(
+            f"{phase:<20}{stats['calls']:>10}{stats['time']:>12.3f}{stats['rows']:>14}"
+            f"{stats['rows'] / stats['calls']:>12.1f}{stats['max_rows'] or 0:>12}"
+            f"{stats['peak_memory'] / 1024**2:>12.1f}"
+        )
+    return "\n".join(lines)
+
+
+def save_trace(path: str) -> None:
+    """
+    Function saving recorded calls as Chrome trace JSON (chrome://tracing, Perfetto).
+
+    Parameters:
+        path (str): path to trace file
+    """
+    if _recorder is None:
+        raise Exception("Instrumentation is not enabled")
+    if not _recorder.trace:
+        raise Exception("Calls are not traced, enable instrumentation with trace=True")
+    with open(path, "w") as file:
+        json.dump({"traceEvents": _recorder.events, "displayTimeUnit": "ms"}, file)
+
+
+@contextmanager
+def instrumented(trace_path: str | None = None, memory: bool = True) -> Iterator[dict]:
+    """
+    Function enabling instrumentation inside with block.
+
+    Parameters:
+        trace_path (str | None): path to Chrome trace file saved at the end of block, calls are not traced if None
+
+        memory (bool): measure peak memory with tracemalloc
+
+    Returns:
+        report (Iterator[dict]): dictionary filled with report (see get_report) at the end of block
+    """
+    report: dict = {}
+    enable_instrumentation(trace_path is not None, memory)
+    try:
+        yield report
+    finally:
+        if trace_path is not None:
+            save_trace(trace_path)
+        report.update(disable_instrumentation())
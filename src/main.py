@@ -1,20 +1,22 @@
 from random import seed
+from config import MODEL_PATH
 from node import Node
-from utils import read_data, randomize_data, evaluate, save_tree
+from utils import read_dataset, randomize_data, evaluate, save_tree
 
 
 if __name__ == "__main__":
     # path = "../data/car.data"
     path = "../data/breast-cancer.data"
     randomize_data(path, "random_data.data")
-    data = read_data("random_data.data")
+    data = read_dataset("random_data.data")
     root = Node()
     results_tt = root.train_and_testv2(data)
     print(
         f"\nResults (T&T) {path.split('/')[-1]}:\nAccuracy: {results_tt[0]}%\nRecall: {results_tt[1]}%\nPrecision: {results_tt[2]}%"
     )
     # if results_tt[0] == 50.0:
-    save_tree(str(root))
+    save_tree(root.iter_string())
+    root.save(MODEL_PATH)
     # root.restore()
     # results_cv = root.cross_validation(data, 4)
     # print(
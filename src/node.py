@@ -1,27 +1,182 @@
+from enum import IntEnum
+from itertools import count
 from math import sqrt
-from uuid import uuid1, UUID
+from typing import Iterator, TextIO
+import sys
+import numpy as np
 from config import (
     DECISION_COLUMN_SYMBOL,
     DATA_FILE_PATH,
     INDENT,
+    JOBS,
+    MAX_DEPTH,
+    MAX_NODES,
+    MIN_GAIN_RATIO,
+    MIN_SAMPLES_SPLIT,
+    OTHER_BIN_VALUE,
+    PARALLEL_SUBTREE_MIN_ROWS,
     PRUNE_THRESHOLD,
     TEST_DATA_RATIO,
 )
+from dataset import Dataset, count_codes, get_threshold_vals
+from compiled_tree import CompiledTree
+from tree_file import read_tree_file, write_tree_file
 from utils import (
-    read_data,
-    get_max_ratio_attr,
-    split_dict,
-    get_unique_values,
+    read_dataset,
+    get_best_split,
+    get_majority_class,
+    get_sorted_rows,
     get_max_key,
+    get_executor,
     get_data_rows,
-    get_data_row,
-    split_dict,
+    get_rows_count,
     merge_datasets,
+    get_classes_index,
+    get_test_stats,
     evaluate,
 )
 
+DECISION_LABEL_PREFIX = "DECISION: "
+
+
+class NodeKind(IntEnum):
+    NODE = 0  # node not built yet
+    ATTRIBUTE = 1  # node splitting data by attribute
+    DECISION = 2  # leaf making decision
+
+
+class GrowthLimits:
+    """
+    Limits of decision tree growth enforced while tree is built (see Node.build_tree_struct),
+    node stopped by a limit becomes a leaf making decision of majority class of its rows.
+    Limit set to None is not enforced. Statistics of a run (created nodes and how many times
+    every limit stopped growth) are reset when building of a tree starts.
+    """
+
+    __slots__ = ("max_depth", "min_samples_split", "min_gain_ratio", "max_nodes", "nodes", "fired")
+
+    def __init__(
+        self,
+        max_depth: int | None = MAX_DEPTH,
+        min_samples_split: int | None = MIN_SAMPLES_SPLIT,
+        min_gain_ratio: float | None = MIN_GAIN_RATIO,
+        max_nodes: int | None = MAX_NODES,
+    ):
+        self.max_depth = max_depth
+        self.min_samples_split = min_samples_split
+        self.min_gain_ratio = min_gain_ratio
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.fired: dict[str, int] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Method clearing statistics before new run (tree root is counted as created node).
+        """
+        self.nodes = 1
+        self.fired = dict.fromkeys(("max_depth", "min_samples_split", "min_gain_ratio", "max_nodes"), 0)
+
+    def spawn(self) -> "GrowthLimits":
+        """
+        Method creating limits with the same values and empty statistics (for subtrees built in worker processes).
+
+        Returns:
+            limits (GrowthLimits): new limits
+        """
+        limits = GrowthLimits(self.max_depth, self.min_samples_split, self.min_gain_ratio, self.max_nodes)
+        limits.nodes = 0
+        return limits
+
+    def merge(self, limits: "GrowthLimits") -> None:
+        """
+        Method adding statistics of limits returned by worker process.
+
+        Parameters:
+            limits (GrowthLimits): limits with statistics of a subtree (see spawn)
+        """
+        self.nodes += limits.nodes
+        for limit, fired in limits.fired.items():
+            self.fired[limit] += fired
+
+    def check_node(self, depth: int, rows_count: int) -> str | None:
+        """
+        Method checking limits of a node before its split is scored.
+
+        Parameters:
+            depth (int): depth of node (root has depth 0)
+
+            rows_count (int): number of rows reaching the node
+
+        Returns:
+            limit (str | None): name of limit stopping growth of the node, None if it can be split
+        """
+        if self.max_depth is not None and depth >= self.max_depth:
+            return self.__fire("max_depth")
+        if self.min_samples_split is not None and rows_count < self.min_samples_split:
+            return self.__fire("min_samples_split")
+        return None
+
+    def check_split(self, ratio: float, children_count: int) -> str | None:
+        """
+        Method checking limits of a chosen split, created children are counted if split is allowed.
+
+        Parameters:
+            ratio (float): gain ratio of split
+
+            children_count (int): number of children created by split
+
+        Returns:
+            limit (str | None): name of limit stopping growth of the node, None if it can be split
+        """
+        if self.min_gain_ratio is not None and ratio < self.min_gain_ratio:
+            return self.__fire("min_gain_ratio")
+        if self.max_nodes is not None and self.nodes + children_count > self.max_nodes:
+            return self.__fire("max_nodes")
+        self.nodes += children_count
+        return None
+
+    def __fire(self, limit: str) -> str:
+        """
+        Method counting node stopped by a limit.
+
+        Parameters:
+            limit (str): name of limit
+
+        Returns:
+            limit (str): name of limit
+        """
+        self.fired[limit] += 1
+        return limit
+
+    def get_report(self) -> dict:
+        """
+        Method returning statistics of last run.
+
+        Returns:
+            report (dict): number of created nodes ("nodes") and number of nodes stopped by every limit ("fired")
+        """
+        return {"nodes": self.nodes, "fired": dict(self.fired)}
+
 
 class Node:
+    __slots__ = (
+        "id",
+        "kind",
+        "name",
+        "val",
+        "threshold",
+        "parent_id",
+        "children",
+        "_children_by_val",
+        "_compiled",
+        "_parent",
+        "stats",
+        "_bins",
+        "_bin_sets",
+    )
+    __ids = count(1)
+
     def __assign_parent(self) -> None:
         """
         Recursive method assigning parent identificator
@@ -38,42 +193,88 @@ class Node:
         label: str = "node",
         children: list["Node"] | None = None,
         val: str = "None",
-        parent_id: UUID | None = None,
+        parent_id: int | None = None,
     ):
-        self.id = uuid1()
+        self.id = next(Node.__ids)
+        self._compiled: CompiledTree | None = None  # cached by compile, cleared when subtree changes
+        self._parent: Node | None = None  # node this node is appended to (not saved nor pickled)
         self.label = label
         self.val = val
+        self.threshold: float | None = None  # threshold of numeric attribute split
         self.parent_id = parent_id
-        self.children = [] if children is None else children
+        self.children: list[Node] = []
+        self._children_by_val: dict[str, Node] | None = None  # created with first child
+        self.stats: dict[str, np.ndarray] | None = None  # contingency tables kept by OnlineTree
+        self.bins = None
+        for child in children or []:
+            self.append_child(child)
         self.__assign_parent()
 
+    @property
+    def label(self) -> str:
+        """
+        Node label: "node", name of attribute or "DECISION: <decision>".
+        """
+        if self.kind == NodeKind.DECISION:
+            return f"{DECISION_LABEL_PREFIX}{self.name}"
+        return self.name
+
+    @label.setter
+    def label(self, label: str) -> None:
+        self.__invalidate()
+        if label.startswith(DECISION_LABEL_PREFIX):
+            self.kind, self.name = NodeKind.DECISION, label[len(DECISION_LABEL_PREFIX):]
+        elif label == "node":
+            self.kind, self.name = NodeKind.NODE, label
+        else:
+            self.kind, self.name = NodeKind.ATTRIBUTE, label
+
+    @property
+    def bins(self) -> dict[str, list[str]] | None:
+        """
+        Values kept by categorical binning (see Dataset.apply_bins), set in tree root.
+        """
+        return self._bins
+
+    @bins.setter
+    def bins(self, bins: dict[str, list[str]] | None) -> None:
+        self._bins = bins
+        self._bin_sets = {attr: set(vals) for attr, vals in (bins or {}).items()}  # used by predict
+
+    @property
+    def is_decision(self) -> bool:
+        """
+        Flag marking leaves making decision.
+        """
+        return self.kind == NodeKind.DECISION
+
     def restore(self) -> None:
         """
         Method restoring node parameters to default.
         """
         self.label = "node"
-        self.children.clear()
+        self.clear_children()
         self.val = "None"
         self.parent_id = None
+        self.bins = None
 
-    def get_child_by_id(self, id: UUID) -> "Node | None":
+    def get_child_by_id(self, id: int) -> "Node | None":
         """
         Method retrieving child of a node by ID.
 
         Parameters:
-            id (UUID): ID of a node to look for
+            id (int): ID of a node to look for
 
         Returns:
             node (Node | None): retrieved node
         """
         if self.id == id:
             return self
-        target = list(filter(lambda node: node.id == id, self.children))
-        return target[0] if len(target) else None
+        return next((c for c in self.children if c.id == id), None)
 
     def get_child_by_value(self, val: str) -> "Node | None":
         """
-        Method retrieving child of a node by value.
+        Method retrieving child of a node by value (first appended one if values repeat).
 
         Parameters:
             val (str): value of a node to look for
@@ -81,8 +282,7 @@ class Node:
         Returns:
             node (Node | None): retrieved node
         """
-        target = [c for c in self.children if c.val == val]
-        return target[0] if len(target) else None
+        return self._children_by_val.get(val) if self._children_by_val else None
 
     def append_child(self, child: "Node") -> None:
         """
@@ -91,7 +291,66 @@ class Node:
         Parameters:
            child (Node): node to be appended
         """
+        self.__invalidate()
+        child._parent = self
         self.children.append(child)
+        if self._children_by_val is None:
+            self._children_by_val = {}
+        self._children_by_val.setdefault(child.val, child)
+
+    def clear_children(self) -> None:
+        """
+        Method removing all children of a node.
+        """
+        self.__invalidate()
+        for child in self.children:
+            child._parent = None
+        self.children.clear()
+        self._children_by_val = None
+        self.threshold = None
+
+    def __invalidate(self) -> None:
+        """
+        Method clearing compiled trees cached by the node and its ancestors (see compile).
+        """
+        node: Node | None = self
+        while node is not None:
+            node._compiled = None
+            node = node._parent
+
+    def __getstate__(self) -> dict:
+        return {
+            slot: getattr(self, slot)
+            for slot in Node.__slots__
+            if slot not in ("_compiled", "_parent") and hasattr(self, slot)
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self._compiled, self._parent = None, None
+        for slot, value in state.items():
+            setattr(self, slot, value)
+        for child in self.children:
+            child._parent = self
+
+    def __adopt(self, subtree: "Node") -> None:
+        """
+        Method taking over label and children of a subtree built in another process.
+        Adopted nodes get new identificators so they are unique in this process.
+
+        Parameters:
+            subtree (Node): subtree to adopt
+        """
+        self.label = subtree.label
+        self.threshold = subtree.threshold
+        for child in subtree.children:
+            self.append_child(child)
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            for child in node.children:
+                child.id = next(Node.__ids)
+                child.parent_id = node.id
+                stack.append(child)
 
     def get_children_vals(self) -> tuple[str | None, ...]:
         """
@@ -119,114 +378,275 @@ class Node:
         max_children_depth = max(depth_of_children) if len(depth_of_children) > 0 else 0
         return depth + max_children_depth
 
-    def to_string(self, indent: int = 0) -> str:
+    def iter_string(self, indent: int = 0) -> Iterator[str]:
         """
-        Recursive method converting node data to string.
+        Recursive method generating parts of node data string (see to_string).
 
         Parameters:
             indent (int): indentation level (node depth)
 
         Returns:
-            text (str): node data as string
+            text_parts (Iterator[str]): parts of node data string
         """
         ind = INDENT * indent
-        output = []
-        output.append(f"\n{ind}ID: {self.id}")
-        output.append(f"{ind}Label: {self.label}")
-        output.append(f"{ind}Value: {self.val}")
-        output.append(f"{ind}Parent: {self.parent_id if self.parent_id else None}")
+        yield (
+            f"\n{ind}ID: {self.id}\n{ind}Label: {self.label}\n{ind}Value: {self.val}"
+            f"\n{ind}Parent: {self.parent_id if self.parent_id else None}"
+        )
         if self.children:
-            output.append(f"{ind}Children:")
+            yield f"\n{ind}Children:"
             for child in self.children:
-                output.append(child.to_string(indent + 1))
-            output.append("\n")
-        return "\n".join(output)
+                yield "\n"
+                yield from child.iter_string(indent + 1)
+            yield "\n\n"
 
-    def __str__(self) -> str:
-        return self.to_string()
+    def write_string(self, file: TextIO) -> None:
+        """
+        Method writing node data string to a file without building whole string in memory.
+
+        Parameters:
+            file (TextIO): file opened for writing
+        """
+        file.writelines(self.iter_string())
+
+    def to_string(self, indent: int = 0) -> str:
+        """
+        Method converting node data to string.
+
+        Parameters:
+            indent (int): indentation level (node depth)
+
+        Returns:
+            text (str): node data as string
+        """
+        return "".join(self.iter_string(indent))
+
+    def save(self, path: str) -> None:
+        """
+        Method saving tree to a binary tree file. File holds tree structure and
+        compiled tree arrays, so it can be loaded with Node.load or CompiledTree.load.
+
+        Parameters:
+            path (str): path to tree file
+        """
+        nodes = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            stack.extend(reversed(node.children))
+        index = {id(node): i for i, node in enumerate(nodes)}
+        names = sorted(set(node.name for node in nodes))
+        vals = sorted(set(node.val for node in nodes))
+        names_index = {name: i for i, name in enumerate(names)}
+        vals_index = {val: i for i, val in enumerate(vals)}
+        child_count = np.array([len(node.children) for node in nodes], dtype=np.int32)
+        header, arrays = self.compile().get_arrays()
+        arrays |= {
+            "kind": np.array([node.kind for node in nodes], dtype=np.int8),
+            "name": np.array([names_index[node.name] for node in nodes], dtype=np.int32),
+            "val": np.array([vals_index[node.val] for node in nodes], dtype=np.int32),
+            "child_start": np.concatenate(([0], np.cumsum(child_count)[:-1])).astype(np.int64),
+            "child_count": child_count,
+            "node_threshold": np.array(
+                [np.nan if node.threshold is None else node.threshold for node in nodes], dtype=np.float64
+            ),
+            "children": np.array(
+                [index[id(child)] for node in nodes for child in node.children], dtype=np.int32
+            ),
+        }
+        write_tree_file(path, header | {"names": names, "vals": vals, "node_bins": self.bins}, arrays)
 
     @staticmethod
-    def visualise(
-        data: dict[str, list[str]] | None = None,
-        data_path: str = DATA_FILE_PATH,
-        level: int = 0,
-        output: list[str] = [],
-    ) -> str | None:
+    def load(path: str, use_mmap: bool = True) -> "Node":
         """
-        Function building text decision tree visualisation.
+        Function loading tree saved with Node.save, nodes get new identificators.
 
         Parameters:
-            data: (dict | None): data in form of a dictionary (key - attribute, value - column content)
+            path (str): path to tree file
 
-            data_path (str): path to dataset file
+            use_mmap (bool): memory map tree arrays instead of reading them
 
-            level (int): level of indentation
+        Returns:
+            tree (Node): loaded tree
+        """
+        header, arrays = read_tree_file(path, use_mmap)
+        names, vals = header["names"], header["vals"]
+        thresholds = arrays.get("node_threshold", np.full(len(arrays["kind"]), np.nan)).tolist()
+        nodes = []
+        for kind, name, val, threshold in zip(
+            arrays["kind"].tolist(), arrays["name"].tolist(), arrays["val"].tolist(), thresholds
+        ):
+            node = Node(val=vals[val])
+            node.kind, node.name = NodeKind(kind), names[name]
+            node.threshold = None if np.isnan(threshold) else threshold
+            nodes.append(node)
+        children = arrays["children"].tolist()
+        for node, start, child_count in zip(
+            nodes, arrays["child_start"].tolist(), arrays["child_count"].tolist()
+        ):
+            for i in children[start:start + child_count]:
+                nodes[i].parent_id = node.id
+                node.append_child(nodes[i])
+        nodes[0].bins = header.get("node_bins")
+        return nodes[0]
+
+    def __str__(self) -> str:
+        return self.to_string()
+
+    def iter_visualisation(self, max_depth: int | None = None, level: int = 0) -> Iterator[str]:
+        """
+        Recursive method generating parts of text visualisation of built decision tree
+        (see visualise), tree is not rebuilt.
+
+        Parameters:
+            max_depth (int | None): depth below which children are not shown ("..." is shown instead), whole tree if None
 
-            output (list): list containing output of visualisation
+            level (int): level of indentation (node depth)
 
         Returns:
-            tree (str | None): tree visualisation in text form
+            text_parts (Iterator[str]): parts of tree visualisation
         """
-        if not data:
-            data = read_data(data_path)
-        attr, ratio = get_max_ratio_attr(data)
-        if abs(ratio) == 0:
-            output.append(f"D: {tuple(sorted(set(data[DECISION_COLUMN_SYMBOL])))[0]}")
+        if self.is_decision:
+            yield f"D: {self.name}"
             return
-        output.append(f"Atrybut: {attr[1]}")
-        level += 1
-        split_data = split_dict(data, get_unique_values(data)[attr], attr)
-        for sd in split_data.values():
-            if level != 0:
-                output.append(f"\n{level*INDENT}{sd[attr][0]} -> ")
-            Node.visualise(sd, level=level, output=output)
-        return "".join(output)
+        if self.kind == NodeKind.NODE:
+            yield self.name
+            return
+        yield f"Atrybut: {self.name[1:]}"
+        if not self.children:
+            return
+        if max_depth is not None and level >= max_depth:
+            yield " ..."
+            return
+        for child in self.children:
+            yield f"\n{(level + 1) * INDENT}{child.val} -> "
+            yield from child.iter_visualisation(max_depth, level + 1)
+
+    def visualise(self, file: TextIO | None = None, max_depth: int | None = None) -> None:
+        """
+        Method writing text visualisation of built decision tree without building whole text in memory.
+
+        Parameters:
+            file (TextIO | None): file opened for writing, standard output if None
+
+            max_depth (int | None): depth below which children are not shown, whole tree if None
+        """
+        file = sys.stdout if file is None else file
+        file.writelines(self.iter_visualisation(max_depth))
+        file.write("\n")
 
     @staticmethod
     def build_tree_struct(
         root: "Node | None" = None,
-        data: dict[str, list[str]] | None = None,
+        data: dict[str, list[str]] | Dataset | None = None,
         data_path: str = DATA_FILE_PATH,
+        rows: np.ndarray | None = None,
+        jobs: int = JOBS,
+        sorted_rows: dict[str, np.ndarray] | None = None,
+        limits: GrowthLimits | None = None,
+        depth: int = 0,
     ) -> "Node | None":
         """
-        Function building decision tree structure.
+        Function building decision tree structure. Subtrees are built from views
+        of rows indexes of one shared dataset, columns are never copied. Numeric attributes
+        are split by thresholds, rows are sorted by their values once and sorted indexes
+        are partitioned between children. Growth is stopped by limits (see GrowthLimits), nodes are
+        created depth-first so max_nodes is used up by first subtrees. With jobs > 1 subtrees of at least
+        PARALLEL_SUBTREE_MIN_ROWS rows are built in a process pool (unless max_nodes is set).
 
         Parameters:
             root: (Node | None): root from which tree will be built
 
+            data (dict[str, list[str]] | Dataset | None): dataset as dictionary or encoded dataset, read from data_path if None
+
             data_path (str): path to dataset file
 
+            rows (np.ndarray | None): indexes of dataset rows to build tree from (reordered in place), all rows if None
+
+            jobs (int): number of worker processes building large subtrees and scoring attributes
+            of large nodes (see get_best_split)
+
+            sorted_rows (dict[str, np.ndarray] | None): rows sorted by every numeric attribute (reordered in place),
+            sorted here if None (see get_sorted_rows)
+
+            limits (GrowthLimits | None): limits of tree growth with statistics of the run, limits from config if None
+
+            depth (int): depth of root in the whole tree, statistics of limits are reset if 0
+
         Returns:
             tree (Node | None): decision tree
         """
         if root is None:
             root = Node()
-        if "DECISION" in root.label:
+        if root.is_decision:
+            return root
+        if data is None:
+            data = read_dataset(data_path)
+        if isinstance(data, dict):
+            data = Dataset.from_dict(data)
+        if rows is None:
+            rows = np.arange(len(data))
+        if limits is None:
+            limits = GrowthLimits()
+        if depth == 0:
+            if not len(rows):
+                raise Exception("Cannot build decision tree from empty dataset")
+            limits.reset()
+            root.bins = dict(data.bins) or None
+        if limits.check_node(depth, data.count_rows(rows)):
+            root.label = f"DECISION: {get_majority_class(data, rows)}"
             return root
-        if not data:
-            data = read_data(data_path)
-        attr, ratio = get_max_ratio_attr(data)
+        if sorted_rows is None:
+            sorted_rows = get_sorted_rows(data, rows)
+        attr, ratio, threshold = get_best_split(data, rows, sorted_rows, jobs)
         if (
             abs(ratio) == 0
         ):  # may return tree consisting of one node if bad dataset is drawn
             root.label = (
-                f"DECISION: {tuple(sorted(set(data[DECISION_COLUMN_SYMBOL])))[0]}"
+                f"DECISION: {data.unique_values(DECISION_COLUMN_SYMBOL, rows)[0]}"
             )
             return root
+        split_rows = data.split_rows(attr, rows, threshold)
+        if limits.check_split(ratio, len(split_rows)):
+            root.label = f"DECISION: {get_majority_class(data, rows)}"
+            return root
         root.label = attr
-        split_data = split_dict(data, get_unique_values(data)[attr], attr)
-        for sd in split_data.values():
-            decision_column_values = tuple(
-                get_unique_values(sd)[DECISION_COLUMN_SYMBOL]
+        root.threshold = threshold
+        split_sorted_rows = [
+            dict(zip(sorted_rows.keys(), groups))
+            for groups in zip(
+                *(data.split_rows(attr, attr_rows, threshold).values() for attr_rows in sorted_rows.values())
             )
+        ] or [{}] * len(split_rows)
+        futures = []
+        for (val, sub_rows), sub_sorted_rows in zip(split_rows.items(), split_sorted_rows):
+            decision_column_values = data.unique_values(DECISION_COLUMN_SYMBOL, sub_rows)
             label = (
                 f"DECISION: {decision_column_values[0]}"
                 if len(decision_column_values) == 1
                 else "node"
             )
-            new_node = Node(label=label, val=f"{sd[attr][0]}", parent_id=root.id)
+            new_node = Node(label=label, val=val, parent_id=root.id)
             root.append_child(new_node)
-            Node.build_tree_struct(new_node, sd)
+            if (
+                jobs > 1
+                and limits.max_nodes is None
+                and not new_node.is_decision
+                and len(sub_rows) >= PARALLEL_SUBTREE_MIN_ROWS
+            ):
+                future = get_executor(jobs).submit(
+                    build_subtree, new_node, data.take(sub_rows), limits.spawn(), depth + 1
+                )
+                futures.append((new_node, future))
+            else:
+                Node.build_tree_struct(
+                    new_node, data, rows=sub_rows, jobs=jobs, sorted_rows=sub_sorted_rows, limits=limits, depth=depth + 1
+                )
+        for new_node, future in futures:
+            subtree, subtree_limits = future.result()
+            new_node.__adopt(subtree)
+            limits.merge(subtree_limits)
         return root
 
     def prune(self) -> str:
@@ -249,138 +669,199 @@ class Node:
         if max_label[1] / float(sum(labels.values())) >= PRUNE_THRESHOLD:
             # print("PRUNEv1 ", self.id)
             self.label = max_label[0]
-            self.children.clear()
+            self.clear_children()
         return self.label
 
-    def test_subtree(self, data: dict[str, list[str]]) -> float:
+    def test_subtree(self, data: dict[str, list[str]] | Dataset) -> float:
         """
         Method testing subtree classification accuracy.
 
         Parameters:
-            data (dict[str, list[str]]): dataset as dictionary
+            data (dict[str, list[str]] | Dataset): dataset as dictionary or encoded dataset
 
         Returns:
             accuracy (float): classification accuracy
         """
-        data_by_row = [
-            get_data_row(data, i) for i in range(len(data[DECISION_COLUMN_SYMBOL]))
-        ]
-        result = 0
-        for row in data_by_row:
-            actual = row[DECISION_COLUMN_SYMBOL][0]
-            pred = self.predict(row)
-            this_node_val = (
-                self.label.split(" ")[1] if len(self.label.split(" ")) > 1 else "None"
-            )
-            if pred == actual or this_node_val == actual:
-                result += 1
-        return result / float(len(data_by_row))
+        if isinstance(data, dict):
+            data = Dataset.from_dict(data)
+        this_node_val = self.name if self.is_decision else "None"
+        vocab = data.vocab[DECISION_COLUMN_SYMBOL]
+        compiled = self.compile()
+        actual = data.codes[DECISION_COLUMN_SYMBOL]
+        preds = get_classes_index(compiled.classes, vocab)[compiled.predict_codes(data)]
+        correct = preds == actual
+        if this_node_val in vocab:
+            correct |= actual == vocab.index(this_node_val)
+        if data.weights is not None:
+            return int(data.weights[correct].sum()) / float(data.count_rows())
+        return int(np.count_nonzero(correct)) / float(get_rows_count(data))
+
+    def prunev2(self, v_dataset: dict[str, list[str]] | Dataset) -> str:
+        """
+        Method pruning decision tree with error calculation. Validation rows are routed
+        through the tree once, pruning is decided bottom-up from counts of rows per class
+        (rows of compressed dataset are counted with weights).
 
-    def prunev2(self, v_dataset: dict[str, list[str]]) -> str:
-        """
-        Recursive method pruning decision tree with error calculation.
+        Parameters:
+            v_dataset (dict[str, list[str]] | Dataset): validation dataset as dictionary or encoded dataset
 
         Returns:
             node_label (str): node label
         """
+        if isinstance(v_dataset, dict):
+            v_dataset = Dataset.from_dict(v_dataset)
+        return self.__prunev2(v_dataset, np.arange(len(v_dataset)))[0]
+
+    def __prunev2(self, v_dataset: Dataset, rows: np.ndarray) -> tuple[str, np.ndarray]:
+        """
+        Recursive method pruning subtree with error calculation.
+
+        Parameters:
+            v_dataset (Dataset): validation dataset
+
+            rows (np.ndarray): indexes of validation rows reaching the node (reordered in place)
+
+        Returns:
+            pruning_result (tuple[str, np.ndarray]): node label and counts of rows per class classified
+            correctly by the subtree
+        """
+        classes = v_dataset.vocab[DECISION_COLUMN_SYMBOL]
+        class_index = {class_: i for i, class_ in enumerate(classes)}
+        counts = count_codes(v_dataset.codes[DECISION_COLUMN_SYMBOL][rows], v_dataset.get_weights(rows), len(classes))
+        correct = np.zeros(len(classes), dtype=np.int64)
         if not self.children:
-            return self.label
-        unique_vals = get_unique_values(v_dataset)[self.label]
-        split_data = split_dict(v_dataset, unique_vals, self.label)
-        children_labels = [
-            self.get_child_by_value(val).prunev2(split_data[val])  # type: ignore
-            for val in unique_vals
-            if self.get_child_by_value(val)
-        ]
+            if self.is_decision and self.name in class_index:
+                correct[class_index[self.name]] = counts[class_index[self.name]]
+            return self.label, correct
+        children_labels = []
+        for val, sub_rows in v_dataset.split_rows(self.name, rows, self.threshold).items():
+            child = self.get_child_by_value(val)
+            if child:
+                child_label, child_correct = child.__prunev2(v_dataset, sub_rows)
+                children_labels.append(child_label)
+                correct += child_correct
+        if not children_labels:
+            return self.label, correct
 
         labels = {
             lab: children_labels.count(lab) for lab in sorted(set(children_labels))
         }
         max_label = get_max_key(labels)
-        subtree_error = 1 - self.test_subtree(v_dataset)
-        leaf_error = 1 - Node(label=max_label[0]).test_subtree(v_dataset)
+        if max_label[0] and "DECISION" not in max_label[0] or not max_label[0]:
+            return self.label, correct
+        rows_count = float(v_dataset.count_rows(rows))
+        subtree_correct = int(correct.sum())
+        if "None" in class_index:  # rows of class "None" are counted as correct by test_subtree
+            none_index = class_index["None"]
+            subtree_correct += int(counts[none_index] - correct[none_index])
+        decision = max_label[0][len(DECISION_LABEL_PREFIX):]
+        leaf_correct = int(counts[class_index[decision]]) if decision in class_index else 0
+        subtree_error = 1 - subtree_correct / rows_count
+        leaf_error = 1 - leaf_correct / rows_count
         test = leaf_error <= subtree_error + sqrt(
-            (subtree_error * (1 - subtree_error))
-            / float(len(v_dataset[DECISION_COLUMN_SYMBOL]))
+            (subtree_error * (1 - subtree_error)) / rows_count
         )
-        if max_label[0] and "DECISION" not in max_label[0] or not max_label[0]:
-            return self.label
-        if test and self.parent_id:
+        if test and self.parent_id is not None:
             # print("PRUNEv2 ", self.id)
             self.label = max_label[0]
-            self.children.clear()
-        return self.label
+            self.clear_children()
+            correct[:] = 0
+            if decision in class_index:
+                correct[class_index[decision]] = leaf_correct
+        return self.label, correct
 
     def predict(self, data_row: dict[str, list[str]]) -> str | None:
         """
-        Recursive function predicting decision with decision tree.
+        Method predicting decision with decision tree, values of categorical attributes
+        not kept by binning (see Dataset.apply_bins) are predicted as OTHER_BIN_VALUE.
 
         Parameters:
             data_row (dict[str, list[str]]): single row from dataset
 
         Returns:
-            decision (str): decision made with decision tree
+            decision (str | None): decision made with decision tree
+        """
+        bins = self._bin_sets
+        node = self
+        while not node.is_decision:
+            val = data_row[node.name][0]
+            if node.threshold is not None:
+                val = get_threshold_vals(node.threshold)[float(val) > node.threshold]
+            elif node.name in bins and val not in bins[node.name]:
+                val = OTHER_BIN_VALUE
+            node = node.get_child_by_value(val)  # type: ignore
+            if not node:
+                return None
+        return node.name
+
+    def compile(self) -> CompiledTree:
+        """
+        Method flattening decision tree into arrays for batch prediction. Compiled tree is
+        cached until the subtree is changed (returned compiled tree doesn't follow later changes).
+
+        Returns:
+            compiled_tree (CompiledTree): flattened decision tree
         """
-        if "DECISION" in self.label:
-            return self.label
-        val = data_row[self.label][0]
-        next_step = self.get_child_by_value(val)
-        if not next_step:
-            return None
-        new_ds = data_row.copy()
-        pred = next_step.predict(new_ds)
-        return pred.split(" ")[1] if pred and "DECISION" in pred else pred
+        if self._compiled is None:
+            self._compiled = CompiledTree.from_node(self)
+        return self._compiled
+
+    def predict_batch(self, data: dict[str, list[str]] | Dataset, dedup: bool = False) -> list[str | None]:
+        """
+        Method predicting decisions for all dataset rows at once with compiled tree.
+
+        Parameters:
+            data (dict[str, list[str]] | Dataset): dataset as dictionary or encoded dataset
+
+            dedup (bool): route every distinct row once (see CompiledTree.predict_codes)
+
+        Returns:
+            decisions (list[str | None]): decisions made with decision tree
+        """
+        return self.compile().predict_batch(data, dedup)
 
     def test_tree(
-        self, test_ds: dict[str, list[str]], d_classes: list[str]
+        self, test_ds: dict[str, list[str]] | Dataset, d_classes: list[str], dedup: bool = False
     ) -> dict[str, list[int]]:
         """
         Method testing decision tree classification with testing dataset.
 
         Parameters:
-            test_ds (dict[str, list[str]]): testing dataset
+            test_ds (dict[str, list[str]] | Dataset): testing dataset
 
             d_classes (list[str]): list of decision classes
 
+            dedup (bool): route every distinct row once (see CompiledTree.predict_codes)
+
         Returns:
             results (dict[str, list[int]]): TP, FP, FN, TN values for each class
         """
-        test_ds_by_row = [
-            get_data_row(test_ds, i)
-            for i in range(len(test_ds[DECISION_COLUMN_SYMBOL]))
+        if isinstance(test_ds, dict):
+            test_ds = Dataset.from_dict(test_ds)
+        d_classes = list(dict.fromkeys(d_classes))
+        compiled = self.compile()
+        actual = get_classes_index(test_ds.vocab[DECISION_COLUMN_SYMBOL], d_classes)[
+            test_ds.codes[DECISION_COLUMN_SYMBOL]
         ]
-        results = {dec: [0, 0, 0, 0] for dec in d_classes}
-        for row in test_ds_by_row:
-            actual = row[DECISION_COLUMN_SYMBOL][0]
-            pred = self.predict(row)
-            for class_ in results.keys():
-                if class_ == actual and pred == class_:
-                    results[class_][0] += 1  # TP
-                elif actual != class_ and pred == class_:
-                    results[class_][1] += 1  # FP
-                elif actual == class_ and pred != class_:
-                    results[class_][2] += 1  # FN
-                elif actual != class_ and pred != class_:
-                    if class_ != pred and class_ != actual:
-                        results[class_][3] += 1  # TN
-        return results
+        preds = get_classes_index(compiled.classes, d_classes)[compiled.predict_codes(test_ds, dedup)]
+        return get_test_stats(actual, preds, d_classes, test_ds.weights)
 
     def train_and_test(
-        self, dataset: dict[str, list[str]], ratio: float = TEST_DATA_RATIO
+        self, dataset: dict[str, list[str]] | Dataset, ratio: float = TEST_DATA_RATIO
     ) -> list[float]:
         """
         T&T method for testing decision tree classification with dataset split into
         train dataset and test dataset with given ratio.
 
         Parameters:
-            dataset (dict[str, list[str]]): dataset as dict
+            dataset (dict[str, list[str]] | Dataset): dataset as dict or encoded dataset
 
             ratio (float): ratio to split dataset by
 
         Returns:
             results (list[float]): accuracy, recall, precision of classification
         """
-        dataset_len = len(dataset[DECISION_COLUMN_SYMBOL])
+        dataset_len = get_rows_count(dataset)
         split_index = int(dataset_len * ratio)
         train_ds = get_data_rows(dataset, stop=split_index)
         test_ds = get_data_rows(dataset, start=split_index, stop=dataset_len)
@@ -389,7 +870,7 @@ class Node:
         return list(evaluate(self.test_tree(test_ds, dataset[DECISION_COLUMN_SYMBOL])))
 
     def train_and_testv2(
-        self, dataset: dict[str, list[str]], ratio: float = TEST_DATA_RATIO
+        self, dataset: dict[str, list[str]] | Dataset, ratio: float = TEST_DATA_RATIO
     ) -> list[float]:
         """
         T&T method for testing decision tree classification with dataset split into
@@ -397,63 +878,61 @@ class Node:
         tree pruning with error calculation.
 
         Parameters:
-            dataset (dict[str, list[str]]): dataset as dict
+            dataset (dict[str, list[str]] | Dataset): dataset as dict or encoded dataset
 
             ratio (float): ratio to split dataset by
 
         Returns:
             results (list[float]): accuracy, recall, precision of classification
         """
-        dataset_len = len(dataset[DECISION_COLUMN_SYMBOL])
+        dataset_len = get_rows_count(dataset)
         split_index = int(dataset_len * ratio)
         train_ds = get_data_rows(dataset, stop=split_index)
         test_ds = get_data_rows(dataset, start=split_index, stop=dataset_len)
-        idx = int(len(train_ds[DECISION_COLUMN_SYMBOL]) * 0.1)
+        idx = int(get_rows_count(train_ds) * 0.1)
         new_train_ds = get_data_rows(train_ds, 0, idx)
         Node.build_tree_struct(self, new_train_ds)
-        v_dataset = get_data_rows(train_ds, idx, len(train_ds[DECISION_COLUMN_SYMBOL]))
+        v_dataset = get_data_rows(train_ds, idx, get_rows_count(train_ds))
         Node.build_tree_struct(self, train_ds)
         self.prunev2(v_dataset)
         return list(evaluate(self.test_tree(test_ds, dataset[DECISION_COLUMN_SYMBOL])))
 
-    def cross_validation(self, dataset: dict[str, list[str]], k: int) -> list[float]:
+    def cross_validation(
+        self, dataset: dict[str, list[str]] | Dataset, k: int, jobs: int = JOBS
+    ) -> list[float]:
         """
         Cross validation method for testing decision tree classification with dataset split into
         k separate chunks, in each of k iterations one of chunks is testing dataset while rest
-        serve as single trainig dataset.
+        serve as single trainig dataset. Every iteration trains its own tree, with jobs > 1
+        iterations are run in a process pool.
 
         Parameters:
-            dataset (dict[str, list[str]]): dataset as dict
+            dataset (dict[str, list[str]] | Dataset): dataset as dict or encoded dataset
 
             k (int): number of dataset chunks
 
+            jobs (int): number of worker processes
+
         Returns:
             results (list[float]): average accuracy, recall, precision of classification
         """
 
-        ds_len = len(dataset[DECISION_COLUMN_SYMBOL])
+        ds_len = get_rows_count(dataset)
         if k < 1:
             raise Exception(f"k cannot be smaller than 1")
         if k > ds_len:
             raise Exception(
                 f"Cannot split dataset into k={k} parts. Dataset is too small."
             )
-        chunk_size = ds_len // k
-        data_chunks = [
-            get_data_rows(
-                dataset, start=split * chunk_size, stop=(split + 1) * chunk_size
-            )
-            for split in range(k)
-        ]
-        results_list = []
-        for i, chunk in enumerate(data_chunks):
-            train_ds = merge_datasets(
-                [chunk for j, chunk in enumerate(data_chunks) if i != j]
-            )
-            Node.build_tree_struct(self, train_ds)
-            self.prune()
-            results_list.append(self.test_tree(chunk, dataset[DECISION_COLUMN_SYMBOL]))
-            self.restore()
+        if isinstance(dataset, dict):
+            dataset = Dataset.from_dict(dataset)
+        d_classes = list(dict.fromkeys(dataset[DECISION_COLUMN_SYMBOL]))
+        if jobs > 1:  # training dataset of every fold is built in its worker
+            futures = [get_executor(jobs).submit(run_fold, dataset, i, k, d_classes) for i in range(k)]
+            results_list = [future.result() for future in futures]
+        else:
+            results_list = [run_fold(dataset, i, k, d_classes) for i in range(k)]
+        self.restore()
         eval_results = [evaluate(res) for res in results_list]
         avg_results = [0.0, 0.0, 0.0]
         for e_res in eval_results:
@@ -462,6 +941,57 @@ class Node:
         return list(map(lambda el: round(el / float(k), 2), avg_results))
 
 
+def build_subtree(
+    root: Node, data: Dataset, limits: GrowthLimits, depth: int
+) -> tuple[Node, GrowthLimits]:
+    """
+    Function building decision tree structure in a worker process.
+
+    Parameters:
+        root (Node): root from which tree will be built
+
+        data (Dataset): dataset of the subtree
+
+        limits (GrowthLimits): limits of tree growth with empty statistics (see GrowthLimits.spawn)
+
+        depth (int): depth of root in the whole tree
+
+    Returns:
+        subtree_with_limits (tuple[Node, GrowthLimits]): decision tree and limits with statistics of the subtree
+    """
+    Node.build_tree_struct(root, data, limits=limits, depth=depth)
+    return root, limits
+
+
+def run_fold(
+    dataset: Dataset, i: int, k: int, d_classes: list[str]
+) -> dict[str, list[int]]:
+    """
+    Function training, pruning and testing new decision tree on single cross validation fold,
+    i-th of k dataset chunks is testing dataset and the rest is merged into training dataset.
+
+    Parameters:
+        dataset (Dataset): whole cross validated dataset
+
+        i (int): index of testing chunk
+
+        k (int): number of dataset chunks
+
+        d_classes (list[str]): list of decision classes
+
+    Returns:
+        results (dict[str, list[int]]): TP, FP, FN, TN values for each class
+    """
+    chunk_size = len(dataset) // k
+    data_chunks = [get_data_rows(dataset, j * chunk_size, (j + 1) * chunk_size) for j in range(k)]
+    test_ds = data_chunks.pop(i)
+    train_ds = merge_datasets(data_chunks)
+    tree = Node()
+    Node.build_tree_struct(tree, train_ds)
+    tree.prune()
+    return tree.test_tree(test_ds, d_classes)
+
+
 if __name__ == "__main__":
     tree = Node(
         label="attr1",
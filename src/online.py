@@ -0,0 +1,214 @@
+import numpy as np
+from config import DECISION_COLUMN_SYMBOL
+from dataset import Dataset, get_code_dtype
+from node import Node, NodeKind, DECISION_LABEL_PREFIX
+from utils import get_contingency_table, get_max_ratio_attr_from_tables
+
+
+class OnlineTree:
+    """
+    Decision tree learned incrementally from batches of rows. Every node keeps contingency
+    tables of all attributes for rows reaching it (Node.stats, empty for leaves with rows
+    of one class as they need no split until rows of other class come), after a batch is added only
+    subtrees whose best split changed are rebuilt, so the tree is always the same as
+    tree built with Node.build_tree_struct (without growth limits) from all rows seen so far.
+    Rows are kept in growable column buffers, so adding a batch copies only its rows
+    (and remaps codes of an attribute only when new values of it come).
+    """
+
+    __slots__ = ("root", "data", "rebuilt_count", "buffers")
+
+    def __init__(self, data: Dataset | dict[str, list[str]] | None = None):
+        self.root = Node()
+        self.data: Dataset | None = None
+        self.rebuilt_count = 0
+        self.buffers: dict[str, np.ndarray] = {}  # codes of all rows, only first len(self.data) are used
+        if data is not None:
+            self.update(data)
+
+    def update(self, batch: Dataset | dict[str, list[str]]) -> int:
+        """
+        Method adding batch of rows to the tree.
+
+        Parameters:
+            batch (Dataset | dict[str, list[str]]): new rows as encoded dataset or dataset dictionary
+
+        Returns:
+            rebuilt_count (int): number of subtrees rebuilt because of the batch
+        """
+        if isinstance(batch, dict):
+            batch = Dataset.from_dict(batch)
+        if batch.numeric:
+            raise Exception("Numeric attributes are not supported by OnlineTree")
+        if batch.weights is not None:
+            raise Exception("Compressed datasets are not supported by OnlineTree")
+        rebuilt_count = self.rebuilt_count
+        if self.data is None:
+            self.__append(batch)
+            self.__rebuild(self.root, np.arange(len(self.data)))  # type: ignore
+            return self.rebuilt_count - rebuilt_count
+        old_vocab, start = self.data.vocab, len(self.data)
+        self.__append(batch)
+        if self.data.vocab != old_vocab:
+            self.__remap_stats(old_vocab)
+        self.__update(self.root, np.arange(start, len(self.data)), [])
+        return self.rebuilt_count - rebuilt_count
+
+    def __append(self, batch: Dataset) -> None:
+        """
+        Method appending batch rows to column buffers (capacity is doubled when it runs out)
+        and replacing self.data with view of all rows.
+
+        Parameters:
+            batch (Dataset): new rows
+        """
+        start = 0 if self.data is None else len(self.data)
+        stop = start + len(batch)
+        codes, vocab = {}, {}
+        for attr in batch.keys() if self.data is None else self.data.keys():
+            old_vocab = [] if self.data is None else self.data.vocab[attr]
+            vocab[attr] = old_vocab
+            buffer = self.buffers.get(attr)
+            if not set(batch.vocab[attr]).issubset(old_vocab):
+                vocab[attr] = sorted(set(old_vocab).union(batch.vocab[attr]))
+                index = {val: code for code, val in enumerate(vocab[attr])}
+                dtype = get_code_dtype(len(vocab[attr]))
+                remap = np.array([index[val] for val in old_vocab], dtype=dtype)
+                new_buffer = np.empty(len(buffer) if buffer is not None else 0, dtype=dtype)
+                if start:
+                    new_buffer[:start] = remap[buffer[:start]]  # type: ignore
+                buffer = new_buffer
+            if len(buffer) < stop:  # type: ignore
+                new_buffer = np.empty(max(stop, 2 * len(buffer)), dtype=buffer.dtype)  # type: ignore
+                new_buffer[:start] = buffer[:start]  # type: ignore
+                buffer = new_buffer
+            index = {val: code for code, val in enumerate(vocab[attr])}
+            remap = np.array([index[val] for val in batch.vocab[attr]], dtype=buffer.dtype)  # type: ignore
+            buffer[start:stop] = remap[batch.codes[attr]] if len(remap) else []  # type: ignore
+            self.buffers[attr] = buffer  # type: ignore
+            codes[attr] = buffer[:stop]  # type: ignore
+        self.data = Dataset(codes, vocab)
+
+    def __get_split(self, stats: dict[str, np.ndarray]) -> tuple[NodeKind, str]:
+        """
+        Method choosing what node with given statistics should be (same way as Node.build_tree_struct).
+
+        Parameters:
+            stats (dict[str, np.ndarray]): contingency tables of node
+
+        Returns:
+            split (tuple[NodeKind, str]): kind of node and name of its attribute or decision
+        """
+        class_counts = next(iter(stats.values())).sum(axis=0)
+        first_class = self.data.vocab[DECISION_COLUMN_SYMBOL][int(np.flatnonzero(class_counts)[0])]
+        if np.count_nonzero(class_counts) == 1:
+            return NodeKind.DECISION, first_class
+        attr, ratio = get_max_ratio_attr_from_tables(stats)
+        if abs(ratio) == 0:
+            return NodeKind.DECISION, first_class
+        return NodeKind.ATTRIBUTE, attr
+
+    def __update(self, node: Node, rows: np.ndarray, path: list[tuple[str, str]]) -> None:
+        """
+        Recursive method adding new rows to statistics of a subtree and rebuilding it if needed.
+
+        Parameters:
+            node (Node): root of subtree
+
+            rows (np.ndarray): indexes of new rows reaching the node (reordered in place)
+
+            path (list[tuple[str, str]]): attributes and values leading from tree root to the node
+        """
+        if not node.stats:  # leaf with rows of one class
+            if self.data.unique_values(DECISION_COLUMN_SYMBOL, rows) != [node.name]:  # type: ignore
+                self.__rebuild(node, self.__get_rows(path))
+            return
+        for attr, table in node.stats.items():
+            table += get_contingency_table(self.data, attr, rows)  # type: ignore
+        kind, name = self.__get_split(node.stats)
+        if (kind, name) != (node.kind, node.name):
+            self.__rebuild(node, self.__get_rows(path))
+            return
+        if kind == NodeKind.DECISION:
+            return
+        for val, sub_rows in self.data.split_rows(name, rows).items():  # type: ignore
+            child = node.get_child_by_value(val)
+            if child:
+                self.__update(child, sub_rows, [*path, (name, val)])
+                continue
+            child = Node(val=val, parent_id=node.id)
+            node.append_child(child)
+            node.children.sort(key=lambda c: c.val)
+            self.__rebuild(child, sub_rows.copy())  # all rows with new value are new
+
+    def __rebuild(self, node: Node, rows: np.ndarray) -> None:
+        """
+        Method building subtree from scratch (same way as Node.build_tree_struct), contingency
+        tables of every node are counted once and kept as its statistics.
+
+        Parameters:
+            node (Node): root of subtree
+
+            rows (np.ndarray): indexes of all rows reaching the node (reordered in place)
+        """
+        data: Dataset = self.data  # type: ignore
+        node.clear_children()
+        attrs = data.keys()[:-1]
+        stack = [(node, rows)]
+        while stack:
+            subtree, subtree_rows = stack.pop()
+            decisions = data.unique_values(DECISION_COLUMN_SYMBOL, subtree_rows)
+            if len(decisions) == 1:
+                subtree.label = f"{DECISION_LABEL_PREFIX}{decisions[0]}"
+                subtree.stats = {}
+                continue
+            subtree.stats = {attr: get_contingency_table(data, attr, subtree_rows) for attr in attrs}
+            kind, name = self.__get_split(subtree.stats)
+            if kind == NodeKind.DECISION:
+                subtree.label = f"{DECISION_LABEL_PREFIX}{name}"
+                continue
+            subtree.label = name
+            for val, sub_rows in data.split_rows(name, subtree_rows).items():
+                child = Node(val=val, parent_id=subtree.id)
+                subtree.append_child(child)
+                stack.append((child, sub_rows))
+        self.rebuilt_count += 1
+
+    def __get_rows(self, path: list[tuple[str, str]]) -> np.ndarray:
+        """
+        Method finding indexes of all rows reaching node at the end of path.
+
+        Parameters:
+            path (list[tuple[str, str]]): attributes and values leading from tree root to the node
+
+        Returns:
+            rows (np.ndarray): indexes of rows
+        """
+        data: Dataset = self.data  # type: ignore
+        mask = np.ones(len(data), dtype=bool)
+        for attr, val in path:
+            mask &= data.codes[attr] == data.vocab[attr].index(val)
+        return np.flatnonzero(mask)
+
+    def __remap_stats(self, old_vocab: dict[str, list[str]]) -> None:
+        """
+        Method moving statistics of all nodes to codes of new vocabularies.
+
+        Parameters:
+            old_vocab (dict[str, list[str]]): vocabularies statistics were collected with
+        """
+        new_vocab = self.data.vocab  # type: ignore
+        remaps = {}
+        for attr, vocab in old_vocab.items():
+            index = {val: code for code, val in enumerate(new_vocab[attr])}
+            remaps[attr] = [index[val] for val in vocab]
+        classes_remap = remaps[DECISION_COLUMN_SYMBOL]
+        classes_count = len(new_vocab[DECISION_COLUMN_SYMBOL])
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            stack.extend(node.children)
+            for attr, table in node.stats.items():  # type: ignore
+                new_table = np.zeros((len(new_vocab[attr]), classes_count), dtype=table.dtype)
+                new_table[np.ix_(remaps[attr], classes_remap)] = table
+                node.stats[attr] = new_table  # type: ignore
@@ -0,0 +1,58 @@
+from argparse import ArgumentParser
+from typing import Iterable, Iterator
+import sys
+from config import DECISION_COLUMN_SYMBOL, MODEL_PATH, READ_CHUNK_ROWS
+from compiled_tree import CompiledTree
+from dataset import Dataset
+from utils import get_headers, read_chunks
+
+
+def predict_chunks(
+    tree: CompiledTree, chunks: Iterable[list[list[str]]], has_decision: bool = True
+) -> Iterator[list[str | None]]:
+    """
+    Function predicting decisions for chunks of rows, only one chunk is kept in memory.
+
+    Parameters:
+        tree (CompiledTree): compiled decision tree
+
+        chunks (Iterable[list[list[str]]]): chunks of rows as lists of strings (see read_chunks)
+
+        has_decision (bool): rows end with decision column (it's ignored)
+
+    Returns:
+        decisions (Iterator[list[str | None]]): decisions for every chunk of rows
+    """
+    for rows in chunks:
+        headers = get_headers(len(rows[0]) + (0 if has_decision else 1))
+        columns = dict(zip(headers, zip(*rows)))
+        missing = [attr for attr in tree.attr_names if attr not in columns]
+        if missing:
+            raise Exception(f"Rows have no attributes used by the tree: {', '.join(missing)}")
+        data = {attr: list(columns[attr]) for attr in tree.attr_names}
+        data[DECISION_COLUMN_SYMBOL] = [""] * len(rows)
+        yield tree.predict_batch(Dataset.from_dict(data))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Predict decisions for rows of data file with saved decision tree.")
+    parser.add_argument("input", nargs="?", default="-", help="path to data file, standard input if - (default)")
+    parser.add_argument("-m", "--model", default=MODEL_PATH, help="path to tree file saved with Node.save")
+    parser.add_argument("-o", "--output", default="-", help="path to predictions file, standard output if - (default)")
+    parser.add_argument("-s", "--sep", default=",", help="separator used in data file")
+    parser.add_argument("-b", "--batch-size", type=int, default=READ_CHUNK_ROWS, help="number of rows predicted at once")
+    parser.add_argument("--no-decision", action="store_true", help="rows have no decision column")
+    args = parser.parse_args()
+    tree = CompiledTree.load(args.model)
+    if args.input == "-":
+        chunks = read_chunks("<stdin>", args.sep, args.batch_size, lines=sys.stdin)
+    else:
+        chunks = read_chunks(args.input, args.sep, args.batch_size)
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for decisions in predict_chunks(tree, chunks, not args.no_decision):
+            output.writelines(f"{decision}\n" for decision in decisions)
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
@@ -0,0 +1,523 @@
+from argparse import ArgumentParser
+from collections import deque
+from time import perf_counter
+import asyncio
+import json
+import numpy as np
+from config import (
+    DECISION_COLUMN_SYMBOL,
+    MODEL_PATH,
+    SERVICE_HOST,
+    SERVICE_PORT,
+    SERVICE_MAX_BATCH,
+    SERVICE_MAX_DELAY,
+    SERVICE_LATENCY_WINDOW,
+)
+from compiled_tree import CompiledTree
+from dataset import Dataset
+from utils import get_headers, read_chunks
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+class ServiceStats:
+    """
+    Counters of prediction service, latencies of last SERVICE_LATENCY_WINDOW requests are kept.
+    """
+
+    __slots__ = ("start", "requests", "rows", "batches", "latencies")
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.latencies: deque[float] = deque(maxlen=SERVICE_LATENCY_WINDOW)
+
+    def to_dict(self, queued_rows: int = 0) -> dict:
+        """
+        Method returning counters with latency percentiles and throughput.
+
+        Parameters:
+            queued_rows (int): number of rows waiting for prediction
+
+        Returns:
+            stats (dict): counters, latencies in milliseconds and rows per second since start
+        """
+        elapsed = perf_counter() - self.start
+        latencies = np.array(self.latencies) * 1000
+        p50, p99 = np.percentile(latencies, [50, 99]).tolist() if len(latencies) else (0.0, 0.0)
+        return {
+            "uptime": elapsed,
+            "requests": self.requests,
+            "rows": self.rows,
+            "batches": self.batches,
+            "mean_batch_rows": self.rows / self.batches if self.batches else 0.0,
+            "queued_rows": queued_rows,
+            "latency_p50_ms": p50,
+            "latency_p99_ms": p99,
+            "rows_per_second": self.rows / elapsed if elapsed else 0.0,
+        }
+
+
+class MicroBatcher:
+    """
+    Queue of rows waiting for prediction, rows of many requests are predicted together
+    when max_batch rows are queued or max_delay seconds passed since first of them came.
+    """
+
+    __slots__ = ("tree", "max_batch", "max_delay", "queue", "queued_rows", "stats")
+
+    def __init__(
+        self,
+        tree: CompiledTree,
+        max_batch: int = SERVICE_MAX_BATCH,
+        max_delay: float = SERVICE_MAX_DELAY,
+    ):
+        self.tree = tree
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.queued_rows = 0
+        self.stats = ServiceStats()
+
+    async def predict(self, rows: list[dict[str, str]]) -> list[str | None]:
+        """
+        Method queueing rows and waiting for their decisions.
+
+        Parameters:
+            rows (list[dict[str, str]]): rows as dictionaries of attribute values
+
+        Returns:
+            decisions (list[str | None]): decisions made with decision tree
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.queued_rows += len(rows)
+        await self.queue.put((rows, future, perf_counter()))
+        return await future
+
+    async def run(self) -> None:
+        """
+        Method predicting queued rows in micro-batches until it's cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            batch_rows = len(batch[0][0])
+            deadline = loop.time() + self.max_delay
+            while batch_rows < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+                batch_rows += len(batch[-1][0])
+            self.queued_rows -= batch_rows
+            rows = [row for request_rows, _, _ in batch for row in request_rows]
+            try:
+                decisions = await loop.run_in_executor(None, self.__predict_rows, rows)
+                results: list = []
+                start = 0
+                for request_rows, _, _ in batch:
+                    results.append(decisions[start:start + len(request_rows)])
+                    start += len(request_rows)
+            except Exception:  # predict requests one by one, so only failing request gets the error
+                results = await loop.run_in_executor(None, self.__predict_requests, batch)
+            end = perf_counter()
+            for (_, future, queued), result in zip(batch, results):
+                if not future.done():
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+                self.stats.latencies.append(end - queued)
+            self.stats.requests += len(batch)
+            self.stats.rows += len(rows)
+            self.stats.batches += 1
+
+    def __predict_requests(self, batch: list[tuple]) -> list[list[str | None] | Exception]:
+        """
+        Method predicting decisions for every queued request separately.
+
+        Parameters:
+            batch (list[tuple]): queued requests (rows, future and queueing time)
+
+        Returns:
+            results (list[list[str | None] | Exception]): decisions of every request or exception it caused
+        """
+        results: list[list[str | None] | Exception] = []
+        for request_rows, _, _ in batch:
+            try:
+                results.append(self.__predict_rows(request_rows))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def __predict_rows(self, rows: list[dict[str, str]]) -> list[str | None]:
+        """
+        Method predicting decisions for a batch of rows with compiled tree.
+
+        Parameters:
+            rows (list[dict[str, str]]): rows as dictionaries of attribute values
+
+        Returns:
+            decisions (list[str | None]): decisions made with decision tree
+        """
+        data = {attr: [row.get(attr, "") for row in rows] for attr in self.tree.attr_names}
+        data[DECISION_COLUMN_SYMBOL] = [""] * len(rows)
+        return self.tree.predict_batch(Dataset.from_dict(data))
+
+
+async def read_http_message(reader: asyncio.StreamReader) -> tuple[str, dict[str, str], bytes] | None:
+    """
+    Function reading HTTP request or response from a stream.
+
+    Parameters:
+        reader (asyncio.StreamReader): stream of connection
+
+    Returns:
+        message (tuple[str, dict[str, str], bytes] | None): start line, headers (lowercase names) and body,
+        None if connection was closed
+    """
+    start_line = await reader.readline()
+    if not start_line:
+        return None
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return start_line.decode("latin-1").strip(), headers, body
+
+
+def is_number(val: str) -> bool:
+    """
+    Function checking if value can be used as value of numeric attribute.
+
+    Parameters:
+        val (str): attribute value
+
+    Returns:
+        is_number (bool): value parses as a number
+    """
+    try:
+        float(val)
+    except ValueError:
+        return False
+    return True
+
+
+def is_valid_row(row: object, numeric_attrs: list[str]) -> bool:
+    """
+    Function checking if request row is a dictionary of attribute names and string values
+    with numbers as values of all numeric attributes of the tree.
+
+    Parameters:
+        row (object): decoded JSON row
+
+        numeric_attrs (list[str]): numeric attributes of the tree
+
+    Returns:
+        is_valid (bool): row can be predicted
+    """
+    return (
+        isinstance(row, dict)
+        and all(isinstance(val, str) for val in row.values())
+        and all(attr in row and is_number(row[attr]) for attr in numeric_attrs)
+    )
+
+
+async def handle_connection(
+    batcher: MicroBatcher, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    """
+    Function serving HTTP requests of one connection: POST /predict with JSON row
+    (attribute name to value) or list of rows, GET /stats with service counters.
+
+    Parameters:
+        batcher (MicroBatcher): queue of rows waiting for prediction
+
+        reader (asyncio.StreamReader): stream reading from connection
+
+        writer (asyncio.StreamWriter): stream writing to connection
+    """
+    try:
+        while message := await read_http_message(reader):
+            start_line, headers, body = message
+            method, path, _ = (start_line.split(" ") + ["", ""])[:3]
+            status, response = 200, {}
+            if path == "/predict" and method == "POST":
+                try:
+                    rows = json.loads(body)
+                except ValueError:
+                    rows = None
+                numeric_attrs = batcher.tree.numeric_attrs
+                if is_valid_row(rows, numeric_attrs) or (
+                    isinstance(rows, list) and all(is_valid_row(row, numeric_attrs) for row in rows)
+                ):
+                    try:
+                        decisions = await batcher.predict([rows] if isinstance(rows, dict) else rows)
+                        response = {"decision": decisions[0]} if isinstance(rows, dict) else {"decisions": decisions}
+                    except Exception as e:
+                        status, response = 500, {"error": f"Prediction failed: {e}"}
+                else:
+                    error = "Body must be JSON row or list of rows with string values"
+                    if numeric_attrs:
+                        error += f" (numbers for numeric attributes {', '.join(numeric_attrs)})"
+                    status, response = 400, {"error": error}
+            elif path == "/stats" and method == "GET":
+                response = batcher.stats.to_dict(batcher.queued_rows)
+            elif path in ("/predict", "/stats"):
+                status, response = 405, {"error": f"Method {method} is not allowed"}
+            else:
+                status, response = 404, {"error": f"Path {path} not found"}
+            await write_response(writer, status, response)
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    except Exception as e:  # malformed request, connection can't be read further
+        try:
+            await write_response(writer, 500, {"error": f"Request failed: {e}"})
+        except ConnectionError:
+            pass
+    finally:
+        writer.close()
+
+
+async def write_response(writer: asyncio.StreamWriter, status: int, response: dict) -> None:
+    """
+    Function writing HTTP response with JSON body.
+
+    Parameters:
+        writer (asyncio.StreamWriter): stream writing to connection
+
+        status (int): HTTP status code (see HTTP_REASONS)
+
+        response (dict): JSON serializable response body
+    """
+    response_body = json.dumps(response).encode()
+    writer.write(
+        f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(response_body)}\r\n\r\n".encode()
+        + response_body
+    )
+    await writer.drain()
+
+
+async def serve(
+    model_path: str = MODEL_PATH,
+    host: str = SERVICE_HOST,
+    port: int = SERVICE_PORT,
+    max_batch: int = SERVICE_MAX_BATCH,
+    max_delay: float = SERVICE_MAX_DELAY,
+) -> None:
+    """
+    Function running prediction service until it's cancelled.
+
+    Parameters:
+        model_path (str): path to tree file saved with Node.save
+
+        host (str): address to listen on
+
+        port (int): port to listen on
+
+        max_batch (int): number of queued rows flushed at once
+
+        max_delay (float): maximal time (seconds) rows wait for a batch to fill up
+    """
+    batcher = MicroBatcher(CompiledTree.load(model_path), max_batch, max_delay)
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(batcher, reader, writer), host, port
+    )
+    batcher_task = asyncio.create_task(batcher.run())
+    print(f"Serving {model_path} on http://{host}:{port}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batcher_task.cancel()
+
+
+class ServiceClient:
+    """
+    Client of prediction service using one keep-alive connection.
+    """
+
+    __slots__ = ("host", "port", "reader", "writer")
+
+    def __init__(self, host: str = SERVICE_HOST, port: int = SERVICE_PORT):
+        self.host = host
+        self.port = port
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def request(self, method: str, path: str, payload: object = None) -> dict:
+        """
+        Method sending request to the service.
+
+        Parameters:
+            method (str): HTTP method
+
+            path (str): request path
+
+            payload (object): JSON serializable request body, no body if None
+
+        Returns:
+            response (dict): decoded JSON response
+        """
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        await self.writer.drain()
+        message = await read_http_message(self.reader)  # type: ignore
+        if message is None:
+            raise Exception("Connection closed by the service")
+        status_line, _, response_body = message
+        response = json.loads(response_body)
+        if status_line.split(" ")[1] != "200":
+            raise Exception(f"Service error {status_line}: {response.get('error')}")
+        return response
+
+    async def predict(self, rows: list[dict[str, str]]) -> list[str | None]:
+        """
+        Method predicting decisions of rows with the service.
+
+        Parameters:
+            rows (list[dict[str, str]]): rows as dictionaries of attribute values
+
+        Returns:
+            decisions (list[str | None]): decisions made with decision tree
+        """
+        return (await self.request("POST", "/predict", rows))["decisions"]
+
+    async def close(self) -> None:
+        """
+        Method closing connection.
+        """
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+            self.reader, self.writer = None, None
+
+
+async def run_load_test(
+    rows: list[dict[str, str]],
+    requests: int = 10000,
+    concurrency: int = 64,
+    rows_per_request: int = 1,
+    host: str = SERVICE_HOST,
+    port: int = SERVICE_PORT,
+) -> dict:
+    """
+    Function sending requests to the service from concurrent clients and measuring latency.
+
+    Parameters:
+        rows (list[dict[str, str]]): rows sent in requests (in turn)
+
+        requests (int): total number of requests
+
+        concurrency (int): number of clients sending requests at the same time
+
+        rows_per_request (int): number of rows in every request
+
+        host (str): address of the service
+
+        port (int): port of the service
+
+    Returns:
+        results (dict): client side latencies (milliseconds), requests and rows per second, service counters
+    """
+    latencies = []
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        client = ServiceClient(host, port)
+        try:
+            for i in counter:
+                start = i * rows_per_request % len(rows)
+                request_rows = (rows[start:] + rows)[:rows_per_request]
+                sent = perf_counter()
+                await client.predict(request_rows)
+                latencies.append(perf_counter() - sent)
+        finally:
+            await client.close()
+
+    start = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = perf_counter() - start
+    stats_client = ServiceClient(host, port)
+    service_stats = await stats_client.request("GET", "/stats")
+    await stats_client.close()
+    p50, p99 = (np.percentile(np.array(latencies) * 1000, [50, 99])).tolist()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "rows_per_request": rows_per_request,
+        "latency_p50_ms": p50,
+        "latency_p99_ms": p99,
+        "requests_per_second": requests / elapsed,
+        "rows_per_second": requests * rows_per_request / elapsed,
+        "service": service_stats,
+    }
+
+
+def read_rows(path: str, count: int, sep: str = ",") -> list[dict[str, str]]:
+    """
+    Function reading first rows of data file as dictionaries of attribute values.
+
+    Parameters:
+        path (str): path to dataset file
+
+        count (int): number of rows to read
+
+        sep (str): separator (between columns) used in data file
+
+    Returns:
+        rows (list[dict[str, str]]): rows as dictionaries of attribute values
+    """
+    chunk = next(read_chunks(path, sep, count))
+    headers = get_headers(len(chunk[0]))
+    return [dict(zip(headers, row)) for row in chunk]
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Decision tree prediction service.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="run prediction service")
+    serve_parser.add_argument("-m", "--model", default=MODEL_PATH, help="path to tree file saved with Node.save")
+    serve_parser.add_argument("--max-batch", type=int, default=SERVICE_MAX_BATCH, help="rows flushed at once")
+    serve_parser.add_argument("--max-delay", type=float, default=SERVICE_MAX_DELAY, help="seconds rows wait for a batch")
+    load_parser = subparsers.add_parser("load-test", help="measure latency and throughput of running service")
+    load_parser.add_argument("data", help="path to data file with rows to send")
+    load_parser.add_argument("-n", "--requests", type=int, default=10000, help="total number of requests")
+    load_parser.add_argument("-c", "--concurrency", type=int, default=64, help="number of concurrent clients")
+    load_parser.add_argument("-r", "--rows-per-request", type=int, default=1, help="rows in every request")
+    for subparser in (serve_parser, load_parser):
+        subparser.add_argument("--host", default=SERVICE_HOST, help="service address")
+        subparser.add_argument("--port", type=int, default=SERVICE_PORT, help="service port")
+    args = parser.parse_args()
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.model, args.host, args.port, args.max_batch, args.max_delay))
+        except KeyboardInterrupt:
+            pass
+    else:
+        test_rows = read_rows(args.data, 10000)
+        results = asyncio.run(
+            run_load_test(test_rows, args.requests, args.concurrency, args.rows_per_request, args.host, args.port)
+        )
+        print(json.dumps(results, indent=2))
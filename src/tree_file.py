@@ -0,0 +1,70 @@
+import json
+import numpy as np
+
+TREE_FILE_MAGIC = b"DTREE\x00"
+TREE_FILE_VERSION = 3
+ALIGNMENT = 64
+
+
+def write_tree_file(path: str, header: dict, arrays: dict[str, np.ndarray]) -> None:
+    """
+    Function writing tree file: magic bytes, format version, JSON header and raw arrays
+    (aligned so they can be memory mapped).
+
+    Parameters:
+        path (str): path to tree file
+
+        header (dict): JSON serializable data saved with arrays
+
+        arrays (dict[str, np.ndarray]): arrays to be saved
+    """
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header_bytes = json.dumps(
+        {"version": TREE_FILE_VERSION, "arrays": layout, **header}
+    ).encode()
+    data_start = -(-(len(TREE_FILE_MAGIC) + 8 + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+    with open(path, "wb") as file:
+        file.write(TREE_FILE_MAGIC)
+        file.write(len(header_bytes).to_bytes(8, "little"))
+        file.write(header_bytes)
+        for name, array in arrays.items():
+            file.seek(data_start + layout[name]["offset"])
+            file.write(np.ascontiguousarray(array).tobytes())
+        file.truncate(data_start + offset)
+
+
+def read_tree_file(path: str, use_mmap: bool = True) -> tuple[dict, dict[str, np.ndarray]]:
+    """
+    Function reading tree file written with write_tree_file.
+
+    Parameters:
+        path (str): path to tree file
+
+        use_mmap (bool): memory map arrays instead of reading them
+
+    Returns:
+        tree_file (tuple[dict, dict[str, np.ndarray]]): header and arrays
+    """
+    with open(path, "rb") as file:
+        if file.read(len(TREE_FILE_MAGIC)) != TREE_FILE_MAGIC:
+            raise Exception(f"{path} is not a tree file")
+        header_size = int.from_bytes(file.read(8), "little")
+        header = json.loads(file.read(header_size))
+    if header["version"] > TREE_FILE_VERSION:
+        raise Exception(
+            f"Tree file version {header['version']} is newer than supported version {TREE_FILE_VERSION}"
+        )
+    data_start = -(-(len(TREE_FILE_MAGIC) + 8 + header_size) // ALIGNMENT) * ALIGNMENT
+    arrays = {}
+    for name, layout in header.pop("arrays").items():
+        dtype, shape = np.dtype(layout["dtype"]), tuple(layout["shape"])
+        offset = data_start + layout["offset"]
+        if use_mmap and int(np.prod(shape)):
+            arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+        else:
+            arrays[name] = np.fromfile(path, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+    return header, arrays
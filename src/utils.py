@@ -1,24 +1,78 @@
-from random import shuffle
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from random import Random
+from tempfile import TemporaryDirectory, mkdtemp
+import hashlib
+import json
 import math
-from typing import Iterable
-from config import DECISION_COLUMN_SYMBOL, OUTPUT_PATH
-
-
-def randomize_data(path: str, output_path: str) -> None:
+import mmap
+import os
+import random
+import shutil
+from typing import Iterable, Iterator
+import numpy as np
+from config import (
+    DECISION_COLUMN_SYMBOL,
+    OUTPUT_PATH,
+    JOBS,
+    PARALLEL_MIN_ROWS,
+    READ_CHUNK_ROWS,
+    CACHE_LOAD_ATTEMPTS,
+    SHUFFLE_MEMORY_BUDGET,
+)
+from dataset import Dataset, DatasetEncoder, count_codes
+
+_executors: dict[int, ProcessPoolExecutor] = {}
+
+
+def randomize_data(
+    path: str,
+    output_path: str,
+    seed: int | None = None,
+    memory_budget: int = SHUFFLE_MEMORY_BUDGET,
+) -> None:
     """
-    Function randomizing data file and saving it to new file.
+    Function randomizing data file and saving it to new file. Files bigger than memory
+    budget are shuffled out of core: lines are scattered randomly into temporary bucket
+    files and every bucket is shuffled in memory and appended to the output.
 
     Parameters:
         path (str): path to dataset file
 
         output_path (str): path to file where randomized data is to be saved
+
+        seed (int | None): seed of random generator, global random state is used if None
+
+        memory_budget (int): size in bytes of data which can be shuffled in memory
     """
-    with open(path, "r") as read_file:
-        file = [line for line in read_file]
-    shuffle(file)
-    with open(output_path, "w") as save_file:
-        for line in file:
-            save_file.write(line)
+    rng = Random(seed) if seed is not None else random
+    file_size = os.path.getsize(path)
+    if file_size <= memory_budget:
+        with open(path, "r") as read_file:
+            file = [line if line.endswith("\n") else f"{line}\n" for line in read_file]
+        rng.shuffle(file)
+        with open(output_path, "w") as save_file:
+            save_file.writelines(file)
+        return
+    buckets_count = 2 * math.ceil(file_size / memory_budget)
+    with TemporaryDirectory() as tmp_dir:
+        bucket_paths = [os.path.join(tmp_dir, f"{i}.bucket") for i in range(buckets_count)]
+        buckets = [open(bucket_path, "w") for bucket_path in bucket_paths]
+        try:
+            with open(path, "r") as read_file:
+                for line in read_file:
+                    buckets[rng.randrange(buckets_count)].write(
+                        line if line.endswith("\n") else f"{line}\n"
+                    )
+        finally:
+            for bucket in buckets:
+                bucket.close()
+        with open(output_path, "w") as save_file:
+            for bucket_path in bucket_paths:
+                with open(bucket_path, "r") as bucket:
+                    lines = bucket.readlines()
+                rng.shuffle(lines)
+                save_file.writelines(lines)
 
 
 def read_data(path: str, sep: str = ",") -> dict[str, list[str]]:
@@ -34,16 +88,192 @@ def read_data(path: str, sep: str = ",") -> dict[str, list[str]]:
     Returns:
         data (dict[str, list[str]]): key - attribute name, value - attribute values
     """
-    with open(path, "r") as file:
-        col_count = len(next(file).strip().split(sep))
-        file.seek(0)
-        data = {
-            DECISION_COLUMN_SYMBOL if i == col_count - 1 else f"c{i + 1}": []
-            for i in range(col_count)
-        }
-        for line in file:
-            load_line(data, line.strip().split(sep))
-    return data
+    return read_dataset(path, sep).to_dict()
+
+
+def read_dataset(
+    path: str,
+    sep: str = ",",
+    chunk_size: int = READ_CHUNK_ROWS,
+    use_mmap: bool = False,
+    cache_dir: str | None = None,
+    numeric: Iterable[str] | str | None = None,
+    max_bins: int | None = None,
+    compress: bool = False,
+) -> Dataset:
+    """
+    Function reading data from a file without headers
+    (.csv is default format) into encoded columnar dataset. File is read in chunks
+    of rows which are encoded right away, so only one chunk of strings is kept in memory.
+
+    Parameters:
+        path (str): path to dataset file
+
+        sep (str): separator (between columns) used in data file
+
+        chunk_size (int): number of rows read at once
+
+        use_mmap (bool): read file through memory mapping
+
+        cache_dir (str | None): directory of binary datasets cache (see read_cached_dataset), cache is not used if None
+
+        numeric (Iterable[str] | str | None): names of numeric attributes (see Dataset.set_numeric),
+        "auto" marks all attributes with only numbers as values, all attributes are categorical if None
+
+        max_bins (int | None): number of bins attributes with more values are put into (see Dataset.get_bins),
+        values are not binned if None
+
+        compress (bool): collapse identical rows into weighted rows (see Dataset.compress),
+        dataset can't be split into training and testing datasets afterwards
+
+    Returns:
+        dataset (Dataset): encoded dataset
+    """
+    if cache_dir is not None:
+        dataset = read_cached_dataset(path, cache_dir, sep, chunk_size, use_mmap)
+    else:
+        encoder = None
+        for rows in read_chunks(path, sep, chunk_size, use_mmap):
+            if encoder is None:
+                encoder = DatasetEncoder(get_headers(len(rows[0])))
+            encoder.add_rows(rows)
+        if encoder is None:
+            raise Exception(f"No data in {path}")
+        dataset = encoder.build()
+    if numeric is not None:
+        dataset.set_numeric(dataset.get_numeric_candidates() if numeric == "auto" else numeric)
+    if max_bins is not None:
+        dataset = dataset.apply_bins(dataset.get_bins(max_bins))
+    if compress:
+        dataset = dataset.compress()
+    return dataset
+
+
+def read_cached_dataset(
+    path: str,
+    cache_dir: str,
+    sep: str = ",",
+    chunk_size: int = READ_CHUNK_ROWS,
+    use_mmap: bool = False,
+) -> Dataset:
+    """
+    Function reading dataset from binary cache, data file is parsed and cached only
+    if it's not cached yet or its size or modification time changed since it was cached.
+    Every version of data file is cached in its own entry, published at once by renaming
+    a temporary directory and never changed, so processes can share the cache.
+    Cached columns are memory mapped.
+
+    Parameters:
+        path (str): path to dataset file
+
+        cache_dir (str): directory of datasets cache
+
+        sep (str): separator (between columns) used in data file
+
+        chunk_size (int): number of rows read at once while parsing
+
+        use_mmap (bool): read file through memory mapping while parsing
+
+    Returns:
+        dataset (Dataset): encoded dataset
+    """
+    source_path = os.path.abspath(path)
+    key = hashlib.sha1(f"{source_path}{os.sep}{sep}".encode()).hexdigest()
+    for _ in range(CACHE_LOAD_ATTEMPTS):
+        stat = os.stat(source_path)
+        entry_name = f"{key}-{stat.st_size}-{stat.st_mtime_ns}"
+        entry_path = os.path.join(cache_dir, entry_name)
+        if not os.path.exists(entry_path):
+            break
+        try:
+            return Dataset.load(entry_path)
+        except FileNotFoundError:  # entry was removed while loading as data file changed
+            continue
+    dataset = read_dataset(path, sep, chunk_size, use_mmap)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = mkdtemp(dir=cache_dir, prefix=".tmp-")
+    dataset.save(tmp_path)
+    with open(os.path.join(tmp_path, "source.json"), "w") as file:
+        json.dump({"path": source_path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sep": sep}, file)
+    try:
+        os.rename(tmp_path, entry_path)
+    except OSError:  # entry was published by another process first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    for name in os.listdir(cache_dir):
+        if name.startswith(f"{key}-") and name != entry_name:
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+    return dataset
+
+
+def read_lines(path: str, use_mmap: bool = False) -> Iterator[str]:
+    """
+    Function lazily reading lines of a file.
+
+    Parameters:
+        path (str): path to file
+
+        use_mmap (bool): read file through memory mapping
+
+    Returns:
+        lines (Iterator[str]): lines of file
+    """
+    if not use_mmap:
+        with open(path, "r") as file:
+            yield from file
+        return
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for line in iter(mm.readline, b""):
+            yield line.decode()
+
+
+def read_chunks(
+    path: str,
+    sep: str = ",",
+    chunk_size: int = READ_CHUNK_ROWS,
+    use_mmap: bool = False,
+    lines: Iterable[str] | None = None,
+) -> Iterator[list[list[str]]]:
+    """
+    Function reading data file in chunks of split rows (empty lines are skipped).
+
+    Parameters:
+        path (str): path to dataset file
+
+        sep (str): separator (between columns) used in data file
+
+        chunk_size (int): number of rows in chunk
+
+        use_mmap (bool): read file through memory mapping
+
+        lines (Iterable[str] | None): lines to read instead of file at path
+
+    Returns:
+        chunks (Iterator[list[list[str]]]): chunks of rows as lists of strings
+    """
+    stripped = (line.strip() for line in (read_lines(path, use_mmap) if lines is None else lines))
+    rows = (line.split(sep) for line in stripped if line)
+    col_count = None
+    while chunk := list(islice(rows, chunk_size)):
+        col_count = col_count or len(chunk[0])
+        if any(len(row) != col_count for row in chunk):
+            raise Exception(f"Rows of {path} have different number of columns")
+        yield chunk
+
+
+def get_headers(col_count: int) -> list[str]:
+    """
+    Function creating headers for data file columns (last column is decision column).
+
+    Parameters:
+        col_count (int): number of columns in data file
+
+    Returns:
+        headers (list[str]): column names
+    """
+    return [
+        DECISION_COLUMN_SYMBOL if i == col_count - 1 else f"c{i + 1}"
+        for i in range(col_count)
+    ]
 
 
 def load_line(data: dict[str, list[str]], line: list[str]) -> None:
@@ -55,12 +285,11 @@ def load_line(data: dict[str, list[str]], line: list[str]) -> None:
 
         line (list[str]): data row as list of strings
     """
-    for index, el in enumerate(line):
-        header = DECISION_COLUMN_SYMBOL if index == len(line) - 1 else f"c{index + 1}"
+    for header, el in zip(get_headers(len(line)), line):
         data[header].append(el)
 
 
-def get_attr_names(data: dict[str, list[str]]) -> list[str]:
+def get_attr_names(data: dict[str, list[str]] | Dataset) -> list[str]:
     """
     Function returning names of all attributes in dataset.
 
@@ -73,33 +302,41 @@ def get_attr_names(data: dict[str, list[str]]) -> list[str]:
     return list(data.keys())
 
 
-def get_unique_values(data: dict[str, list[str]]) -> dict[str, list[str]]:
+def get_unique_values(data: dict[str, list[str]] | Dataset) -> dict[str, list[str]]:
     """
     Function returning unique values of attributes.
 
     Parameters:
-        data (dict[str, list[str]]): dataset as dictionary
+        data (dict[str, list[str]] | Dataset): dataset as dictionary or encoded dataset
 
     Returns:
         unique_attr_vals (dict[str, set[str]]): key - attribute name, value - unique values found in column
     """
+    if isinstance(data, Dataset):
+        return {key: data.unique_values(key) for key in data.keys()}
     return {key: sorted(set(value)) for key, value in data.items()}
 
 
 def get_unique_values_count(
-    data: dict[str, list[str]], unique_values: dict[str, set[str]]
+    data: dict[str, list[str]] | Dataset, unique_values: dict[str, set[str]]
 ) -> dict[str, dict[str, int]]:
     """
     Function returning number of every unique attribute value in dataset.
 
     Parameters:
-        data (dict[str, list[str]]): dataset as dictionary
+        data (dict[str, list[str]] | Dataset): dataset as dictionary or encoded dataset
 
         unique_values (unique_values: dict[str, set[str]]): key - attribute name, value - unique values found in column
 
     Returns:
         key - attribute name, value - dictionary with unique values as keys and its count in column as values
     """
+    if isinstance(data, Dataset):
+        counts = {class_: data.value_counts(class_) for class_ in unique_values.keys()}
+        return {
+            class_: {value: counts[class_].get(value, 0) for value in unique_values}
+            for class_, unique_values in unique_values.items()
+        }
     return {
         class_: {value: data[class_].count(value) for value in unique_values}
         for class_, unique_values in unique_values.items()
@@ -107,19 +344,25 @@ def get_unique_values_count(
 
 
 def get_values_propabilities(
-    data: dict[str, list[str]], unique_values: dict[str, list[str]]
+    data: dict[str, list[str]] | Dataset, unique_values: dict[str, list[str]]
 ) -> dict[str, dict[str, float]]:
     """
     Function returning propabilities of every attribute value in columns.
 
     Parameters:
-        data (dict[str, list[str]]): dataset as dictionary
+        data (dict[str, list[str]] | Dataset): dataset as dictionary or encoded dataset
 
         unique_values (unique_values: dict[str, set[str]]): key - attribute name, value - unique values found in column
 
     Returns:
         values_propabilities: key - attribute name, value - dictionary with unique values as keys and its propabilities as values
     """
+    if isinstance(data, Dataset):
+        rows_count = float(data.count_rows())
+        return {
+            class_: {value: round(count / rows_count, 2) for value, count in counts.items()}
+            for class_, counts in get_unique_values_count(data, unique_values).items()
+        }
     return {
         class_: {
             value: round(data[class_].count(value) / float(len(data[class_])), 2)
@@ -170,20 +413,22 @@ def get_class_entropy(values_propabilities: dict[str, dict[str, float]]) -> dict
 
 
 def split_dict(
-    data: dict[str, list[str]], split_vals: Iterable[str], col_name: str
-) -> dict[str, dict[str, list[str]]]:
+    data: dict[str, list[str]] | Dataset, split_vals: Iterable[str], col_name: str
+) -> dict[str, dict[str, list[str]]] | dict[str, Dataset]:
     """
     Function splitting data by attribute values.
 
     Parameters:
-        data (dict[str, list[str]]): dataset as dictionary
+        data (dict[str, list[str]] | Dataset): dataset as dictionary or encoded dataset
 
         split_vals (Iterable[str]): values to split dataset by
 
     Returns:
-        split_data (dict[str, dict[str, list[str]]]): key - attribute value by which data was split,\
-            value - data dict split by attribute values (for example only rows where attribute c1 equals 'new')
+        split_data (dict[str, dict[str, list[str]]] | dict[str, Dataset]): key - attribute value by which data was split,\
+            value - data split by attribute values (for example only rows where attribute c1 equals 'new')
     """
+    if isinstance(data, Dataset):
+        return data.split(col_name, split_vals)
     rows_indexes = {
         sv: [i for i in range(len(data[col_name])) if data[col_name][i] == sv]
         for sv in split_vals
@@ -194,31 +439,44 @@ def split_dict(
     }
 
 
-def get_rows_count(data: dict[str, list[str]]) -> int:
+def get_rows_count(data: dict[str, list[str]] | Dataset) -> int:
     """
     Function returning number of rows in loaded data (length of decision column values list).
 
     Parameters:
-        data (dict[str, list[str]]): dataset as dictionary
+        data (dict[str, list[str]] | Dataset): dataset as dictionary or encoded dataset
 
     Returns:
         rows_count (int): length of decision column values list
     """
+    if isinstance(data, Dataset):
+        return len(data)
     return len(data[DECISION_COLUMN_SYMBOL])
 
 
-def calc_info(data: dict[str, list[str]], attr: str) -> float:
+def calc_info(data: dict[str, list[str]] | Dataset, attr: str) -> float:
     """
     Function calculating info of a given attribute in dataset dictionary.
 
     Parameters:
-        data (dict[str, list[str]]): dataset as dictionary
+        data (dict[str, list[str]] | Dataset): dataset as dictionary or encoded dataset
 
         attr (str): name of attribute
 
     Returns:
         attr_info (float): calculated info of given attribute
     """
+    if isinstance(data, Dataset):
+        rows_count = data.count_rows()
+        info = []
+        for sd in data.split(attr).values():
+            sd_rows_count = float(sd.count_rows())
+            propabilities = tuple(
+                round(count / sd_rows_count, 2)
+                for count in sd.value_counts(DECISION_COLUMN_SYMBOL).values()
+            )
+            info.append((sd.count_rows() / rows_count) * calc_entropy(propabilities))
+        return sum(info)
     attr_unique_values = tuple(get_unique_values(data)[attr])
     sorted_data = split_dict(data, attr_unique_values, attr)
     decision_columns = {
@@ -236,19 +494,24 @@ def calc_info(data: dict[str, list[str]], attr: str) -> float:
 
 
 def calc_col_entropy(
-    data: dict[str, list[str]], attr_name: str = DECISION_COLUMN_SYMBOL
+    data: dict[str, list[str]] | Dataset, attr_name: str = DECISION_COLUMN_SYMBOL
 ) -> float:
     """
     Function calculating entropy of a given attribute.
 
     Parameters:
-        data (dict[str, list[str]]): dataset as dictionary
+        data (dict[str, list[str]] | Dataset): dataset as dictionary or encoded dataset
 
         attr_name (str): name of attribute to calculate entropy
 
     Returns:
         entropy (float): calculated entropy of an attribute
     """
+    if isinstance(data, Dataset):
+        rows_count = float(data.count_rows())
+        return calc_entropy(
+            tuple(round(count / rows_count, 2) for count in data.value_counts(attr_name).values())
+        )
     values_propabilities = tuple(
         get_values_propabilities(data, get_unique_values(data))[attr_name].values()
     )
@@ -256,13 +519,13 @@ def calc_col_entropy(
 
 
 def calc_gain_ratio(
-    data: dict[str, list[str]], attr_name: str
+    data: dict[str, list[str]] | Dataset, attr_name: str
 ) -> tuple[float, float, float, float]:
     """
     Function returning tuple with attribute parameters.
 
     Parameters:
-        data (dict[str, list[str]]): dataset as dictionary
+        data (dict[str, list[str]] | Dataset): dataset as dictionary or encoded dataset
 
         attr_name (str): name of attribute
 
@@ -281,36 +544,399 @@ def calc_gain_ratio(
     return decision_col_entropy, attr_info, info_gain, gain_ratio
 
 
-def get_max_ratio_attr(data: dict[str, list[str]]) -> tuple[str, float]:
+def get_contingency_table(
+    data: Dataset, attr_name: str, rows: np.ndarray | None = None
+) -> np.ndarray:
     """
-    Function returning attribute name with highest info gain ratio in given dataset.
+    Function counting rows for every pair of attribute value and decision class in a single pass
+    (rows of compressed dataset are counted with weights).
 
     Parameters:
-        data (dict[str, list[str]]): dataset as dictionary
+        data (Dataset): encoded dataset
+
+        attr_name (str): name of attribute
+
+        rows (np.ndarray | None): indexes of rows to count, all rows if None
 
     Returns:
-        attr_with_max_ratio (tuple[str, float]): attribute name with is gain ratio
+        table (np.ndarray): rows count, row - attribute value code, column - decision class code
+    """
+    classes_count = len(data.vocab[DECISION_COLUMN_SYMBOL])
+    attr_codes = data.codes[attr_name]
+    decision_codes = data.codes[DECISION_COLUMN_SYMBOL]
+    if rows is not None:
+        attr_codes, decision_codes = attr_codes[rows], decision_codes[rows]
+    pairs = attr_codes.astype(np.int64) * classes_count + decision_codes
+    return count_codes(
+        pairs, data.get_weights(rows), len(data.vocab[attr_name]) * classes_count
+    ).reshape(-1, classes_count)
+
+
+def calc_counts_entropy(counts: Iterable[int]) -> float:
     """
-    ratios = {
-        attr: calc_gain_ratio(data, attr)[3] for attr in get_attr_names(data)[:-1]
+    Function calculating entropy of a column from counts of its values
+    (propabilities are rounded the same way as in get_values_propabilities).
+
+    Parameters:
+        counts (Iterable[int]): counts of values in order of values
+
+    Returns:
+        entropy (float): calculated entropy
+    """
+    counts = [count for count in counts if count]
+    rows_count = float(sum(counts))
+    return calc_entropy(tuple(round(count / rows_count, 2) for count in counts))
+
+
+def calc_table_gain_ratio(
+    table: np.ndarray, decision_col_entropy: float | None = None
+) -> tuple[float, float, float, float]:
+    """
+    Function returning tuple with attribute parameters calculated from its contingency table,
+    results are equal to calc_gain_ratio results.
+
+    Parameters:
+        table (np.ndarray): contingency table of an attribute (see get_contingency_table)
+
+        decision_col_entropy (float | None): entropy of the decision column, calculated from table if None
+
+    Returns:
+        params (tuple[float, float, float, float]): Tuple containing:
+        [0] - entropy of the decision column
+        [1] - info for a chosen attribute
+        [2] - info gain for a chosen attribute
+        [3] - gain ratio for a chosen attribute
+    """
+    rows = [row for row in table.tolist() if any(row)]
+    rows_count = sum(map(sum, rows))
+    if decision_col_entropy is None:
+        decision_col_entropy = calc_counts_entropy(table.sum(axis=0).tolist())
+    attr_entropy = calc_counts_entropy(map(sum, rows))
+    attr_info = sum([(sum(row) / rows_count) * calc_counts_entropy(row) for row in rows])
+    info_gain = decision_col_entropy - attr_info
+    gain_ratio = info_gain / attr_entropy if attr_entropy != 0.0 else 0.0
+    return decision_col_entropy, attr_info, info_gain, gain_ratio
+
+
+def get_executor(jobs: int) -> ProcessPoolExecutor:
+    """
+    Function returning process pool with given number of workers, pools are created once and reused.
+
+    Parameters:
+        jobs (int): number of worker processes
+
+    Returns:
+        executor (ProcessPoolExecutor): process pool
+    """
+    if jobs not in _executors:
+        _executors[jobs] = ProcessPoolExecutor(max_workers=jobs)
+    return _executors[jobs]
+
+
+def calc_gain_ratios(
+    data: Dataset,
+    attrs: list[str],
+    rows: np.ndarray | None = None,
+    decision_col_entropy: float | None = None,
+) -> list[float]:
+    """
+    Function calculating gain ratios of attributes.
+
+    Parameters:
+        data (Dataset): encoded dataset
+
+        attrs (list[str]): names of attributes
+
+        rows (np.ndarray | None): indexes of rows to consider, all rows if None
+
+        decision_col_entropy (float | None): entropy of the decision column, calculated for every attribute if None
+
+    Returns:
+        ratios (list[float]): gain ratios in order of attributes
+    """
+    return [
+        calc_table_gain_ratio(get_contingency_table(data, attr, rows), decision_col_entropy)[3]
+        for attr in attrs
+    ]
+
+
+def calc_gain_ratios_parallel(
+    data: Dataset,
+    attrs: list[str],
+    rows: np.ndarray | None,
+    decision_col_entropy: float,
+    jobs: int,
+) -> list[float]:
+    """
+    Function calculating gain ratios of attributes in a process pool, every worker
+    gets its share of attribute columns (restricted to chosen rows).
+
+    Parameters:
+        data (Dataset): encoded dataset
+
+        attrs (list[str]): names of attributes
+
+        rows (np.ndarray | None): indexes of rows to consider, all rows if None
+
+        decision_col_entropy (float): entropy of the decision column
+
+        jobs (int): number of worker processes
+
+    Returns:
+        ratios (list[float]): gain ratios in order of attributes
+    """
+    decision_codes = data.codes[DECISION_COLUMN_SYMBOL]
+    decision_codes = decision_codes if rows is None else decision_codes[rows]
+    futures = []
+    for share in (attrs[i::jobs] for i in range(jobs)):
+        if not share:
+            continue
+        codes = {attr: data.codes[attr] if rows is None else data.codes[attr][rows] for attr in share}
+        codes[DECISION_COLUMN_SYMBOL] = decision_codes
+        vocab = {attr: data.vocab[attr] for attr in codes.keys()}
+        futures.append(
+            (
+                share,
+                get_executor(jobs).submit(
+                    calc_gain_ratios,
+                    Dataset(codes, vocab, weights=data.get_weights(rows)),
+                    share,
+                    None,
+                    decision_col_entropy,
+                ),
+            )
+        )
+    ratios = {}
+    for share, future in futures:
+        ratios.update(zip(share, future.result()))
+    return [ratios[attr] for attr in attrs]
+
+
+def get_sorted_rows(data: Dataset, rows: np.ndarray | None = None) -> dict[str, np.ndarray]:
+    """
+    Function sorting rows indexes by values of every numeric attribute.
+
+    Parameters:
+        data (Dataset): encoded dataset
+
+        rows (np.ndarray | None): indexes of rows to sort, all rows if None
+
+    Returns:
+        sorted_rows (dict[str, np.ndarray]): key - numeric attribute name, value - rows indexes sorted by its values
+    """
+    rows = np.arange(len(data)) if rows is None else rows
+    return {
+        attr: rows[np.argsort(values[data.codes[attr][rows]], kind="stable")]
+        for attr, values in data.numeric.items()
     }
+
+
+def calc_counts_entropies(counts: np.ndarray) -> np.ndarray:
+    """
+    Function calculating entropies of many class distributions at once (propabilities aren't rounded).
+
+    Parameters:
+        counts (np.ndarray): rows count, row - distribution, column - decision class
+
+    Returns:
+        entropies (np.ndarray): entropy of every distribution
+    """
+    propabilities = counts / counts.sum(axis=1, keepdims=True)
+    logs = np.log2(propabilities, where=propabilities > 0, out=np.zeros_like(propabilities))
+    return -np.sum(propabilities * logs, axis=1)
+
+
+def calc_threshold_gain_ratio(
+    data: Dataset,
+    attr_name: str,
+    sorted_rows: np.ndarray,
+    decision_col_entropy: float | None = None,
+) -> tuple[float | None, float]:
+    """
+    Function choosing threshold of numeric attribute (C4.5 binary split). All thresholds
+    between consecutive distinct values are scored in one sweep over rows sorted by the attribute,
+    threshold with highest info gain is chosen and gain ratio of the split is calculated
+    the same way as gain ratio of categorical attributes (see calc_table_gain_ratio).
+    Thresholds leaving a branch with rounded propability 0 are skipped if possible,
+    as their gain ratio is always 0.
+
+    Parameters:
+        data (Dataset): encoded dataset
+
+        attr_name (str): name of numeric attribute
+
+        sorted_rows (np.ndarray): indexes of rows to consider sorted by attribute values (see get_sorted_rows)
+
+        decision_col_entropy (float | None): entropy of the decision column, calculated from rows if None
+
+    Returns:
+        threshold_with_ratio (tuple[float | None, float]): threshold (rows with values lower or equal go left)
+        and gain ratio of the split, None and 0.0 if all rows have the same value
+    """
+    values = data.numeric[attr_name][data.codes[attr_name][sorted_rows]]
+    cuts = np.flatnonzero(values[:-1] < values[1:])
+    if not len(cuts):
+        return None, 0.0
+    classes_count = len(data.vocab[DECISION_COLUMN_SYMBOL])
+    weights = data.get_weights(sorted_rows)
+    left = np.zeros((len(sorted_rows), classes_count), dtype=np.int64)
+    left[np.arange(len(sorted_rows)), data.codes[DECISION_COLUMN_SYMBOL][sorted_rows]] = 1 if weights is None else weights
+    np.cumsum(left, axis=0, out=left)
+    left_counts = left[cuts]
+    right_counts = left[-1] - left_counts
+    rows_count = float(left[-1].sum())
+    left_rows = left_counts.sum(axis=1).astype(np.float64)
+    info = (
+        left_rows * calc_counts_entropies(left_counts)
+        + (rows_count - left_rows) * calc_counts_entropies(right_counts)
+    )
+    left_propabilities = np.round(left_rows / rows_count, 2)
+    balanced = (left_propabilities > 0) & (left_propabilities < 1)
+    if balanced.any():
+        info[~balanced] = np.inf
+    best = int(np.argmin(info))
+    table = np.stack([left_counts[best], right_counts[best]])
+    return float(values[cuts[best]]), calc_table_gain_ratio(table, decision_col_entropy)[3]
+
+
+def get_best_split(
+    data: dict[str, list[str]] | Dataset,
+    rows: np.ndarray | None = None,
+    sorted_rows: dict[str, np.ndarray] | None = None,
+    jobs: int = JOBS,
+) -> tuple[str, float, float | None]:
+    """
+    Function choosing split with highest info gain ratio in given dataset. Categorical attributes
+    split rows by every value, numeric attributes by threshold (see calc_threshold_gain_ratio).
+    With jobs > 1 categorical attributes of datasets with at least PARALLEL_MIN_ROWS rows are
+    scored in a process pool, chosen split is the same as in serial mode.
+
+    Parameters:
+        data (dict[str, list[str]] | Dataset): dataset as dictionary or encoded dataset
+
+        rows (np.ndarray | None): indexes of encoded dataset rows to consider, all rows if None
+
+        sorted_rows (dict[str, np.ndarray] | None): rows sorted by every numeric attribute (see get_sorted_rows),
+        sorted here if None
+
+        jobs (int): number of worker processes
+
+    Returns:
+        split (tuple[str, float, float | None]): attribute name, its gain ratio and threshold (None for categorical attribute)
+    """
+    if isinstance(data, dict):
+        data = Dataset.from_dict(data)
+    decision_codes = data.codes[DECISION_COLUMN_SYMBOL]
+    decision_col_entropy = calc_counts_entropy(
+        count_codes(decision_codes if rows is None else decision_codes[rows], data.get_weights(rows)).tolist()
+    )
+    attrs = get_attr_names(data)[:-1]
+    categorical = [attr for attr in attrs if attr not in data.numeric]
+    rows_count = len(data) if rows is None else len(rows)
+    if jobs > 1 and rows_count >= PARALLEL_MIN_ROWS:
+        gain_ratios = calc_gain_ratios_parallel(data, categorical, rows, decision_col_entropy, jobs)
+    else:
+        gain_ratios = calc_gain_ratios(data, categorical, rows, decision_col_entropy)
+    ratios = dict(zip(categorical, gain_ratios))
+    thresholds = {}
+    if data.numeric and sorted_rows is None:
+        sorted_rows = get_sorted_rows(data, rows)
+    for attr in data.numeric.keys():
+        thresholds[attr], ratios[attr] = calc_threshold_gain_ratio(
+            data, attr, sorted_rows[attr], decision_col_entropy  # type: ignore
+        )
+    attr, ratio = get_max_ratio({attr: ratios[attr] for attr in attrs})
+    return attr, ratio, thresholds.get(attr)
+
+
+def get_majority_class(data: Dataset, rows: np.ndarray | None = None) -> str:
+    """
+    Function finding the most frequent decision class of rows (first class in sorted order wins a tie).
+
+    Parameters:
+        data (Dataset): encoded dataset
+
+        rows (np.ndarray | None): indexes of rows to consider, all rows if None
+
+    Returns:
+        decision (str): majority decision class
+    """
+    decision_codes = data.codes[DECISION_COLUMN_SYMBOL]
+    counts = count_codes(decision_codes if rows is None else decision_codes[rows], data.get_weights(rows))
+    return data.vocab[DECISION_COLUMN_SYMBOL][int(np.argmax(counts))]
+
+
+def get_max_ratio_attr(
+    data: dict[str, list[str]] | Dataset,
+    rows: np.ndarray | None = None,
+    jobs: int = JOBS,
+) -> tuple[str, float]:
+    """
+    Function returning attribute name with highest info gain ratio in given dataset
+    (numeric attributes are scored with their best threshold, see get_best_split).
+
+    Parameters:
+        data (dict[str, list[str]] | Dataset): dataset as dictionary or encoded dataset
+
+        rows (np.ndarray | None): indexes of encoded dataset rows to consider, all rows if None
+
+        jobs (int): number of worker processes
+
+    Returns:
+        attr_with_max_ratio (tuple[str, float]): attribute name with is gain ratio
+    """
+    attr, ratio, _ = get_best_split(data, rows, jobs=jobs)
+    return attr, ratio
+
+
+def get_max_ratio_attr_from_tables(tables: dict[str, np.ndarray]) -> tuple[str, float]:
+    """
+    Function returning attribute name with highest info gain ratio calculated from
+    contingency tables of attributes, result is equal to get_max_ratio_attr result.
+
+    Parameters:
+        tables (dict[str, np.ndarray]): key - attribute name (in dataset order), value - its contingency table
+
+    Returns:
+        attr_with_max_ratio (tuple[str, float]): attribute name with is gain ratio
+    """
+    decision_col_entropy = calc_counts_entropy(next(iter(tables.values())).sum(axis=0).tolist())
+    return get_max_ratio(
+        {
+            attr: calc_table_gain_ratio(table, decision_col_entropy)[3]
+            for attr, table in tables.items()
+        }
+    )
+
+
+def get_max_ratio(ratios: dict[str, float]) -> tuple[str, float]:
+    """
+    Function returning attribute with highest gain ratio (first one if there is a tie).
+
+    Parameters:
+        ratios (dict[str, float]): key - attribute name, value - its gain ratio
+
+    Returns:
+        attr_with_max_ratio (tuple[str, float]): attribute name with is gain ratio
+    """
     max_ratio_attr = list(ratios.keys())[0]
     for attr, ratio in ratios.items():
         max_ratio_attr = attr if ratio > ratios[max_ratio_attr] else max_ratio_attr
     return max_ratio_attr, ratios[max_ratio_attr]
 
 
-def save_tree(tree: str | None, path: str = OUTPUT_PATH) -> None:
+def save_tree(tree: str | Iterable[str] | None, path: str = OUTPUT_PATH) -> None:
     """
     Saves textual tree visualisation to a .txt file.
 
     Parameters:
-        tree (str | None): string containing tree representation.
+        tree (str | Iterable[str] | None): string containing tree representation or its parts (written as they come).
     """
-    f = open(path, "w")
-    if tree:
-        f.write(tree)
-    f.close()
+    with open(path, "w") as f:
+        if isinstance(tree, str):
+            f.write(tree)
+        elif tree:
+            f.writelines(tree)
 
 
 def get_max_key(
@@ -335,35 +961,40 @@ def get_max_key(
 
 
 def get_data_rows(
-    data: dict[str, list[str]], start: int = 0, stop: int = 1
-) -> dict[str, list[str]]:
+    data: dict[str, list[str]] | Dataset, start: int = 0, stop: int = 1
+) -> dict[str, list[str]] | Dataset:
     """
-    Function getting rows from dataset (from 0 to n).
+    Function getting rows from dataset (from 0 to n), compressed dataset (see Dataset.compress)
+    can't be split as its rows don't have positions of original rows.
 
     Parameters:
-        data (dict[str, list[str]]): dataset as dictionary
+        data (dict[str, list[str]] | Dataset): dataset as dictionary or encoded dataset
 
         start (int): subset start index
 
         stop (int): subset stop index
 
     Returns:
-        rows (dict[str, list[str]]): rows separated from dataset
+        rows (dict[str, list[str]] | Dataset): rows separated from dataset
     """
-    ds_length = len(data[DECISION_COLUMN_SYMBOL])
+    ds_length = get_rows_count(data)
     if start < 0 or stop < 0:
         raise Exception("Start and stop cannot be smaller than 0")
     if start > ds_length or stop > ds_length:
         raise Exception("Not enough rows in dataset")
+    if isinstance(data, Dataset):
+        if data.weights is not None:
+            raise Exception("Compressed dataset cannot be split by rows positions, compress it after splitting")
+        return data.slice(start, stop)
     return {key: value[start:stop] for key, value in data.items()}
 
 
-def get_data_row(data: dict[str, list[str]], index: int) -> dict[str, list[str]]:
+def get_data_row(data: dict[str, list[str]] | Dataset, index: int) -> dict[str, list[str]]:
     """
     Function getting single row from dataset at specified index.
 
     Parameters:
-        data (dict[str, list[str]]): dataset as dictionary
+        data (dict[str, list[str]] | Dataset): dataset as dictionary or encoded dataset
 
         index (int): index of row to get
 
@@ -372,11 +1003,60 @@ def get_data_row(data: dict[str, list[str]], index: int) -> dict[str, list[str]]
     """
     if index < 0:
         raise Exception("Start and stop cannot be smaller than 0")
-    if index > len(data[DECISION_COLUMN_SYMBOL]):
+    if index > get_rows_count(data):
         raise Exception("Index not in dataset")
+    if isinstance(data, Dataset):
+        return data.row(index)
     return {key: value[index : index + 1] for key, value in data.items()}
 
 
+def get_classes_index(vals: list[str], d_classes: list[str]) -> np.ndarray:
+    """
+    Function mapping values (e.g. vocabulary of decision column) to indexes of decision classes.
+
+    Parameters:
+        vals (list[str]): values to map
+
+        d_classes (list[str]): list of decision classes (without repetitions)
+
+    Returns:
+        classes_index (np.ndarray): index of class of every value (-1 if value isn't a class),
+        additional last element -1 maps code -1 (no value)
+    """
+    index = {class_: i for i, class_ in enumerate(d_classes)}
+    return np.array([index.get(val, -1) for val in vals] + [-1], dtype=np.int64)
+
+
+def get_test_stats(
+    actual: np.ndarray, preds: np.ndarray, d_classes: list[str], weights: np.ndarray | None = None
+) -> dict[str, list[int]]:
+    """
+    Function counting classification results for every decision class from confusion matrix.
+
+    Parameters:
+        actual (np.ndarray): indexes of actual decisions in d_classes (-1 if decision isn't listed)
+
+        preds (np.ndarray): indexes of predicted decisions in d_classes (-1 if decision isn't listed or missing)
+
+        d_classes (list[str]): list of decision classes (without repetitions)
+
+        weights (np.ndarray | None): weights of rows (see Dataset.compress), every row counted once if None
+
+    Returns:
+        results (dict[str, list[int]]): TP, FP, FN, TN values for each class
+    """
+    size = len(d_classes) + 1
+    confusion = count_codes((actual + 1) * size + preds + 1, weights, size * size).reshape(size, size)
+    tp = np.diagonal(confusion)[1:]
+    fp = confusion[:, 1:].sum(axis=0) - tp
+    fn = confusion[1:, :].sum(axis=1) - tp
+    tn = int(confusion.sum()) - tp - fp - fn
+    return {
+        class_: [int(tp[i]), int(fp[i]), int(fn[i]), int(tn[i])]
+        for i, class_ in enumerate(d_classes)
+    }
+
+
 def evaluate(stats: dict[str, list[int]]) -> list[float]:
     """
     Function calculating average classification quality metrics from test statistics.
@@ -400,18 +1080,22 @@ def evaluate(stats: dict[str, list[int]]) -> list[float]:
     ]
 
 
-def merge_datasets(datasets: list[dict[str, list[str]]]) -> dict[str, list[str]]:
+def merge_datasets(
+    datasets: list[dict[str, list[str]]] | list[Dataset],
+) -> dict[str, list[str]] | Dataset:
     """
     Function merging list of datasets into one.
 
     Parameters:
-        datasets (list[dict[str, list[str]]]): list of dataset dictionaries
+        datasets (list[dict[str, list[str]]] | list[Dataset]): list of dataset dictionaries or encoded datasets
 
     Returns:
-        new_ds (dict[str, list[str]]): merged datasets
+        new_ds (dict[str, list[str]] | Dataset): merged datasets
     """
+    if isinstance(datasets[0], Dataset):
+        return Dataset.concat(datasets)  # type: ignore
     new_ds = {attr: [] for attr in datasets[0].keys()}
     for ds in datasets:
         for attr in ds.keys():
-            new_ds[attr] = ds[attr]
+            new_ds[attr] += ds[attr]
     return new_ds